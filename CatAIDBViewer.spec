@@ -1,5 +1,13 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
+from pathlib import Path
 
+# Ship a minified stylesheet next to the original; app.py prefers it when frozen
+sys.path.insert(0, os.path.join(SPECPATH, 'src'))
+from utils.qss import write_minified
+
+write_minified(Path(SPECPATH) / 'src' / 'ui' / 'ios_style.qss')
 
 a = Analysis(
     ['src\\app.py'],
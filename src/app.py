@@ -1,109 +1,171 @@
-from PyQt6.QtWidgets import QApplication
+import os
 import sys
 
+# PyInstaller runtime state, resolved once at import
+_FROZEN = getattr(sys, 'frozen', False)
+_MEIPASS = getattr(sys, '_MEIPASS', None)
+
 # If running from a PyInstaller onefile bundle, ensure the unpacked 'src' folder is on sys.path
 # so imports like 'from db.metadata import ...' that rely on the project 'src' layout succeed.
 try:
-    if getattr(sys, 'frozen', False):
-        meipass = getattr(sys, '_MEIPASS', None)
-        if meipass:
-            import os
-            src_bundle_path = os.path.join(meipass, 'src')
-            if os.path.isdir(src_bundle_path) and src_bundle_path not in sys.path:
-                sys.path.insert(0, src_bundle_path)
+    if _FROZEN and _MEIPASS:
+        # No isdir() probe: a missing entry on sys.path is harmless
+        src_bundle_path = os.path.join(_MEIPASS, 'src')
+        if src_bundle_path not in sys.path:
+            sys.path.insert(0, src_bundle_path)
 except Exception:
     # best-effort: do not block startup if this fails
     pass
 
-from main_window import MainWindow
-
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
 from pathlib import Path
 
+# Root used to locate bundled resources (ui/ios_style.qss, ...)
+_BASE_DIR = Path(_MEIPASS) if _MEIPASS else Path(__file__).resolve().parent
+
+
+# Seconds between forced flushes of the buffered file log
+_LOG_FLUSH_INTERVAL = 5.0
+
+
+def _start_periodic_flush(handler):
+    """Flush ``handler`` every _LOG_FLUSH_INTERVAL seconds from a daemon thread."""
+    stop = threading.Event()
+
+    def _run():
+        while not stop.wait(_LOG_FLUSH_INTERVAL):
+            handler.flush()
+
+    threading.Thread(target=_run, name='log-flush', daemon=True).start()
+    atexit.register(stop.set)
+
+
+# Set once _configure_logging() has run
+_LOG_CONFIGURED = False
+
 
 def _configure_logging():
-    """Set up a simple logging configuration for development.
+    """Set up a simple logging configuration.
 
-    - Logs DEBUG+ to console via basicConfig
-    - Also writes to a rotating file under the user's .catdbviewer/logs folder
+    - Logs INFO+ to stderr (DEBUG+ when CATDBVIEWER_DEBUG is set)
+    - Unless CATDBVIEWER_NO_FILE_LOG is set, also writes to a rotating file under the
+      user's .catdbviewer/logs folder; records are handed to a QueueListener thread and
+      written in batches, so file I/O never runs on the GUI thread
     """
-    # Console + basic formatting with more detailed info
-    logging.basicConfig(
-        level=logging.DEBUG, 
-        format='%(asctime)s %(levelname)-8s %(name)-20s: %(message)s',
-        force=True  # Override any existing basicConfig
-    )
-
-    # Set specific loggers to DEBUG to ensure we see our messages
-    logging.getLogger('db.connection').setLevel(logging.DEBUG)
-    logging.getLogger('db.metadata').setLevel(logging.DEBUG)
-    logging.getLogger('db.executor').setLevel(logging.DEBUG)
-    logging.getLogger('main_window').setLevel(logging.DEBUG)
-    logging.getLogger('__main__').setLevel(logging.DEBUG)
-
-    # Ensure log directory exists
+    global _LOG_CONFIGURED
+    # Repeated calls (e.g. from tests) must not reopen the log file or restart the listener
+    if _LOG_CONFIGURED:
+        return
+    _LOG_CONFIGURED = True
+
+    level = logging.DEBUG if os.environ.get('CATDBVIEWER_DEBUG') else logging.INFO
+
+    # One formatter shared by the console and file handlers; it caches the
+    # strftime part of asctime per second
+    from utils.log_format import CachedTimeFormatter
+
+    formatter = CachedTimeFormatter('%(asctime)s %(levelname)-8s %(name)-20s: %(message)s')
+
+    # Console; replaces any handlers installed earlier (what basicConfig(force=True) did)
+    root = logging.getLogger()
+    for h in root.handlers[:]:
+        root.removeHandler(h)
+        h.close()
+    root.setLevel(level)
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(formatter)
+    root.addHandler(console)
+
+    # Set specific loggers to the chosen level to ensure we see our messages
+    logging.getLogger('db.connection').setLevel(level)
+    logging.getLogger('db.metadata').setLevel(level)
+    logging.getLogger('db.executor').setLevel(level)
+    logging.getLogger('main_window').setLevel(level)
+    logging.getLogger('__main__').setLevel(level)
+
+    # Developers can skip file logging (and its handler thread) entirely
+    if os.environ.get('CATDBVIEWER_NO_FILE_LOG'):
+        return
+
+    # The log directory and file are only created once the first record is written
     log_dir = Path.home() / '.catdbviewer' / 'logs'
     try:
-        log_dir.mkdir(parents=True, exist_ok=True)
+        # logging.handlers pulls in socket/pickle/queue; only import it when configuring
+        import queue
+        from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+        from utils.log_handlers import SizeCachedRotatingFileHandler
+
         log_file = log_dir / 'catdbviewer.log'
-        handler = RotatingFileHandler(str(log_file), maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8')
-        handler.setLevel(logging.DEBUG)
-        formatter = logging.Formatter('%(asctime)s %(levelname)-8s %(name)-20s: %(message)s')
+        handler = SizeCachedRotatingFileHandler(
+            str(log_file), maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8', delay=True
+        )
+        handler.setLevel(level)
         handler.setFormatter(formatter)
-        logging.getLogger().addHandler(handler)
-        print(f"File logging configured: {log_file}")
+        # Buffer records and write them in batches: on ERROR, when the buffer fills,
+        # or every _LOG_FLUSH_INTERVAL seconds
+        buffered = MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=handler, flushOnClose=True)
+        buffered.setLevel(level)
+        atexit.register(buffered.close)
+        _start_periodic_flush(buffered)
+        # Do the file I/O on a listener thread so the GUI thread only enqueues records
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, buffered, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        root.addHandler(QueueHandler(log_queue))
+        logging.getLogger(__name__).info('File logging configured: %s', log_file)
     except Exception as e:
         # best-effort: if file logging cannot be configured, continue with console logging only
-        print(f"Failed to configure file logger: {e}")
-        logging.getLogger(__name__).exception('Failed to configure file logger')
+        logging.getLogger(__name__).warning('Failed to configure file logger: %s', e, exc_info=True)
 
 
-def _apply_qss(app):
-    """Apply a QSS stylesheet if present.
+# Resolved stylesheet text, kept so repeated main() calls (tests) skip the lookup.
+_QSS_CACHE = None
+
+
+def _load_qss():
+    """Return the QSS stylesheet text, or None if it cannot be found.
 
     Resolution order (best-effort):
-    1. If running from a PyInstaller onefile bundle, look in sys._MEIPASS/ui/ios_style.qss
-    2. Look for ui/ios_style.qss next to the source file (development mode)
+    1. If running from a PyInstaller onefile bundle, prefer the build-time minified
+       sys._MEIPASS/ui/ios_style.min.qss (see utils/qss.py), then ios_style.qss
+    2. Otherwise look for ui/ios_style.qss next to the source file (development mode)
     3. If ui is available as a package, try importlib.resources to read the text
-    Any failure is logged but does not prevent application startup.
     """
-    try:
-        import sys
-        from pathlib import Path
-        import logging
-        # Try PyInstaller runtime folder first
-        base = Path(getattr(sys, '_MEIPASS', Path(__file__).resolve().parent))
-        qss_path = base / 'ui' / 'ios_style.qss'
+    global _QSS_CACHE
+    if _QSS_CACHE is not None:
+        return _QSS_CACHE
+
+    # Only bundles prefer the minified copy, so a stale one never hides dev edits
+    names = ('ios_style.min.qss', 'ios_style.qss') if _FROZEN else ('ios_style.qss',)
+    for name in names:
+        qss_path = _BASE_DIR / 'ui' / name
         if qss_path.exists():
-            with qss_path.open('r', encoding='utf-8') as f:
-                app.setStyleSheet(f.read())
-            return
+            _QSS_CACHE = qss_path.read_text(encoding='utf-8')
+            return _QSS_CACHE
+
+    # Last resort: only pay for importlib.resources when the filesystem lookup missed
+    import importlib.resources
+    try:
+        # 'ui' package inside project (make ui a package by adding __init__.py)
+        _QSS_CACHE = importlib.resources.files('ui').joinpath('ios_style.qss').read_bytes().decode('utf-8')
+        return _QSS_CACHE
+    except (FileNotFoundError, ModuleNotFoundError):
+        return None
 
-        # Fallback: source tree next to this file (development)
-        src_qss = Path(__file__).resolve().parent / 'ui' / 'ios_style.qss'
-        if src_qss.exists():
-            with src_qss.open('r', encoding='utf-8') as f:
-                app.setStyleSheet(f.read())
-            return
 
-        # Last resort: try to read from package resources if ui is installed as a package
-        try:
-            import importlib.resources as pkg_resources
-            try:
-                # 'ui' package inside project (make ui a package by adding __init__.py)
-                if pkg_resources.files('ui'):
-                    q = pkg_resources.files('ui').joinpath('ios_style.qss')
-                    if q.is_file():
-                        txt = q.read_text(encoding='utf-8')
-                        app.setStyleSheet(txt)
-                        return
-            except Exception:
-                # ignore package resource failures
-                pass
-        except Exception:
-            pass
+def _apply_qss(app):
+    """Apply a QSS stylesheet if present.
 
+    Any failure is logged but does not prevent application startup.
+    """
+    try:
+        txt = _load_qss()
+        if txt is not None:
+            app.setStyleSheet(txt)
+            return
         logging.getLogger(__name__).debug('QSS stylesheet not found in bundled or source locations')
     except Exception:
         logging.getLogger(__name__).exception('Failed to apply QSS stylesheet')
@@ -111,11 +173,19 @@ def _apply_qss(app):
 
 def main():
     _configure_logging()
+    # Qt and the main window pull in the bulk of the import cost; load them
+    # only once we are actually launching the GUI.
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from main_window import MainWindow
+
     app = QApplication(sys.argv)
-    # Apply optional iOS-like QSS theme if available
-    _apply_qss(app)
     window = MainWindow()
     window.show()
+    # Apply optional iOS-like QSS theme once the window is up so it doesn't delay first paint.
+    # MainWindow only toggles dynamic properties for dark mode, which the stylesheet picks up
+    # whenever it is set, so applying it late is safe.
+    QTimer.singleShot(0, lambda: _apply_qss(app))
     sys.exit(app.exec())
 
 
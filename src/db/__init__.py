@@ -1,8 +1,9 @@
 """Database package for CatAIDBViewer.
 
-Creating this empty __init__ makes the `db` directory a package so
-imports such as `from db.metadata import ...` resolve correctly both
-in development and when bundled with PyInstaller.
+This __init__ makes the `db` directory a package so imports such as
+`from db.metadata import ...` resolve correctly both in development and
+when bundled with PyInstaller. Submodules listed in `__all__` are only
+imported when first accessed as attributes of the package.
 """
 
 __all__ = [
@@ -10,3 +11,14 @@ __all__ = [
     "executor",
     "metadata",
 ]
+
+
+def __getattr__(name):
+    """Import submodules on first attribute access (PEP 562)."""
+    if name in __all__:
+        import importlib
+
+        mod = importlib.import_module(f".{name}", __name__)
+        globals()[name] = mod
+        return mod
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,18 +1,265 @@
 import os
+import re
 import json
+import time
+import queue
+import socket
+import atexit
+import functools
+import threading
+import weakref
+from types import MappingProxyType
 from typing import Dict, Any
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine, URL
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.pool import StaticPool
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs, unquote
 import codecs
 import logging
 
+from .metadata import SchemaDescription, clear_schema_cache, describe, set_active_connection_manager
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib json module
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_CONFIG_PATH = Path(os.path.expanduser("~")) / \
     ".catdbviewer" / "config.json"
 
+# Matches the schema in a libpq options string such as "-c search_path=foo -c TimeZone=UTC"
+_SEARCH_PATH_RE = re.compile(r"search_path\s*=\s*([\w\",]+)")
+_PLAIN_IDENT_RE = re.compile(r"[a-z_][a-z0-9_$]*")
+
+# add_connection() keywords that describe the connection itself rather than URL query parameters
+_SCHEMA_KEYS = ("schema", "search_path", "currentSchema")
+_CONNECTION_FIELDS = ("user", "password", "host", "port", "database", "driver") + _SCHEMA_KEYS
+
+# rot13 table used to obfuscate saved passwords (the mapping is its own inverse)
+_ROT13 = str.maketrans(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz",
+    "NOPQRSTUVWXYZABCDEFGHIJKLMnopqrstuvwxyzabcdefghijklm")
+
+# Splits a URL netloc into user, password, host and port in one match
+_NETLOC_RE = re.compile(r"^(?:([^:]*)(?::(.*))?@)?([^:]*)(?::(.*))?$", re.S)
+
+# Shared create_engine() options for every connection so pooling/caching is tuned in one place:
+# a larger compiled-statement cache, and pings/recycling so stale pooled connections are replaced
+_ENGINE_KWARGS = {
+    "future": True,
+    "query_cache_size": 1200,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+}
+
+# Seconds a driver may spend establishing a connection, and the connect() keyword each DBAPI
+# driver accepts for it; enforced by the driver itself so no watchdog thread is needed. Drivers
+# without a reliable connect-timeout keyword are left out (sqlite's "timeout" is the busy-lock
+# wait, and pymssql only has login_timeout in some versions).
+_CONNECT_TIMEOUT = 5
+_CONNECT_TIMEOUT_KW = {
+    "psycopg2": "connect_timeout",
+    "psycopg": "connect_timeout",
+    "pg8000": "timeout",
+    "pymysql": "connect_timeout",
+    "mysqldb": "connect_timeout",
+    "mysqlconnector": "connection_timeout",
+    "mariadbconnector": "connect_timeout",
+    "pyodbc": "timeout",
+}
+
+# Default server ports and the timeout of the TCP reachability probe run before connect tests
+_DEFAULT_PORTS = {"postgresql": 5432, "mysql": 3306}
+_TCP_PROBE_TIMEOUT = 2.0
+
+# Seconds the config writer waits after a change so rapid additions share one write
+_SAVE_COALESCE_DELAY = 0.05
+
+# Managers with a running config writer; flushed at exit without keeping them alive
+_SAVING_MANAGERS: "weakref.WeakSet[ConnectionManager]" = weakref.WeakSet()
+
+
+def _config_save_worker(manager_ref: "weakref.ref[ConnectionManager]", save_queue: "queue.Queue[bool]") -> None:
+    """Write configs for one manager; only holds it strongly while a write is pending."""
+    while True:
+        pending = save_queue.get()
+        try:
+            manager = manager_ref() if pending else None
+            if manager is None:
+                # stop request, or the manager was garbage collected
+                return
+            # short coalescing window so bursts of changes produce a single write
+            time.sleep(_SAVE_COALESCE_DELAY)
+            manager._write_config()
+            del manager
+        finally:
+            save_queue.task_done()
+
+
+def _stop_config_save_worker(save_queue: "queue.Queue[bool]") -> None:
+    try:
+        save_queue.put_nowait(False)
+    except queue.Full:
+        # the queued write finds the manager gone and ends the worker
+        pass
+
+
+@atexit.register
+def _flush_all_configs() -> None:
+    """Make sure pending config writes land before the interpreter exits."""
+    for manager in list(_SAVING_MANAGERS):
+        manager.flush_config()
+
+
+def _json_loads(raw: bytes) -> Any:
+    """Parse UTF-8 JSON bytes (an optional BOM is accepted), using orjson when available."""
+    if raw.startswith(codecs.BOM_UTF8):
+        raw = raw[len(codecs.BOM_UTF8):]
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize to indented UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+
+def _search_path_option(schema: str) -> str:
+    """libpq ``options`` fragment that sets search_path in the connection startup packet.
+
+    schema may be a comma-separated list. Each element that is not a plain lower-case identifier
+    (or already double-quoted) is quoted so its case survives, and spaces are backslash-escaped
+    as libpq requires.
+    """
+    parts = []
+    for part in schema.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not (_PLAIN_IDENT_RE.fullmatch(part) or (len(part) > 1 and part[0] == part[-1] == '"')):
+            part = '"' + part.replace('"', '""') + '"'
+        parts.append(part)
+    return "-c search_path=" + ",".join(parts).replace(" ", "\\ ")
+
+
+def _with_search_path(options: str | None, schema: str) -> str:
+    """options with a search_path fragment for schema added, unless options already sets one."""
+    if not options:
+        return _search_path_option(schema)
+    if _SEARCH_PATH_RE.search(options):
+        return options
+    return options + " " + _search_path_option(schema)
+
+
+def _probe_address(cfg: Dict[str, Any]):
+    """(host, port) of a saved server connection for the TCP probe, or None when not probeable."""
+    if isinstance(cfg.get("url"), str):
+        try:
+            url_obj = make_url(cfg["url"])
+        except Exception:
+            return None
+        backend, host, port = url_obj.get_backend_name(), url_obj.host, url_obj.port
+    else:
+        # an empty host leaves the engine host unset, so the driver uses its Unix socket
+        backend, host = cfg.get("type"), cfg.get("host") or None
+        try:
+            port = int(cfg["port"]) if cfg.get("port") else None
+        except (TypeError, ValueError):
+            return None
+    if backend not in _DEFAULT_PORTS or not host or host.startswith("/"):
+        return None
+    if backend == "mysql" and host == "localhost":
+        # MySQL client libraries connect to "localhost" through the Unix socket, not TCP
+        return None
+    return host, port or _DEFAULT_PORTS[backend]
+
+
+def _tcp_reachable(host: str, port: int, timeout: float = _TCP_PROBE_TIMEOUT) -> bool:
+    """Whether a TCP connection to host:port can be opened within timeout."""
+    try:
+        socket.create_connection((host, port), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+
+def _create_engine(url, **kwargs) -> Engine:
+    """create_engine() with the shared options, the DBAPI driver's connect timeout and,
+    for server databases, LIFO pool checkout.
+
+    A timeout given explicitly in the URL query or ``connect_args`` is left untouched.
+    """
+    url_obj = make_url(url)
+    backend = url_obj.get_backend_name()
+    connect_args = dict(kwargs.pop("connect_args", None) or {})
+    timeout_kw = _CONNECT_TIMEOUT_KW.get(url_obj.get_driver_name())
+    if timeout_kw and timeout_kw not in url_obj.query:
+        connect_args.setdefault(timeout_kw, _CONNECT_TIMEOUT)
+    if backend != "sqlite":
+        # Reuse the most recently returned connection so server-side caches stay warm and
+        # surplus pooled connections idle out
+        kwargs.setdefault("pool_use_lifo", True)
+    if url_obj.get_driver_name() == "psycopg2":
+        # Send executemany() UPDATE/DELETE batches (e.g. grid edits) as pages of statements per
+        # round-trip rather than one round-trip per row
+        kwargs.setdefault("executemany_mode", "values_plus_batch")
+        kwargs.setdefault("executemany_batch_page_size", 500)
+    return create_engine(url_obj, connect_args=connect_args, **kwargs, **_ENGINE_KWARGS)
+
+
+def _create_sqlite_engine(path: str) -> Engine:
+    """Create an engine for a SQLite file (absolute path); ``:memory:`` gets a single shared connection."""
+    if path == ":memory:":
+        return _create_engine("sqlite://", poolclass=StaticPool,
+                              connect_args={"check_same_thread": False})
+    return _create_engine(f"sqlite:///{path}")
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_url(drivername, username, password, host, port, database, query_items) -> URL:
+    """URL.create memoized on its (hashable) arguments; query is passed as sorted item tuples.
+
+    URL objects are immutable, so the same instance can back any number of engines.
+    """
+    return URL.create(
+        drivername=drivername,
+        username=username,
+        password=password,
+        host=host,
+        port=port,
+        database=database,
+        query=dict(query_items) or None,
+    )
+
+
+def _to_str_with_fallback(v):
+    """Coerce bytes/unicode inputs to str robustly (None stays None)."""
+    if v is None or isinstance(v, str):
+        return v
+    if isinstance(v, bytes):
+        # UTF-8 is by far the common case; only fall back to legacy encodings on failure
+        try:
+            return v.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+        for enc in ("cp936", "latin-1"):
+            try:
+                return v.decode(enc)
+            except UnicodeDecodeError:
+                continue
+        # last resort
+        return v.decode("utf-8", errors="replace")
+    try:
+        return str(v)
+    except Exception:
+        return None
+
 
 def parse_jdbc_url(jdbc_url: str) -> dict:
     """Parse a JDBC URL into a dict of connection parameters.
@@ -20,7 +267,19 @@ def parse_jdbc_url(jdbc_url: str) -> dict:
     Supports jdbc:postgresql://host:port/db?key=val and jdbc:mysql://...
     Returns a dict with keys: conn_type ('postgresql'|'mysql'), host, port, database, params (dict)
     and optional username/password if present in the URL.
+
+    Parsed results are memoized per URL string; each call returns a fresh dict (and params
+    dict) so callers may mutate the result freely.
     """
+    cached = _parse_jdbc_url_cached(jdbc_url)
+    out = dict(cached)
+    out['params'] = dict(cached['params'])
+    return out
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_jdbc_url_cached(jdbc_url: str) -> MappingProxyType:
+    """Uncached parser behind parse_jdbc_url; returns a read-only mapping with params as a tuple."""
     if not jdbc_url.startswith("jdbc:"):
         raise ValueError("Not a JDBC URL")
     # strip leading jdbc:
@@ -42,26 +301,20 @@ def parse_jdbc_url(jdbc_url: str) -> dict:
     host = None
     port = None
     if parsed.netloc:
-        # urlparse gives netloc as [user[:pass]@]host[:port]
-        if '@' in parsed.netloc:
-            userinfo, hostinfo = parsed.netloc.rsplit('@', 1)
-            if ':' in userinfo:
-                u, p = userinfo.split(':', 1)
+        # urlparse gives netloc as [user[:pass]@]host[:port]; the greedy password group
+        # backtracks to the last '@' so passwords containing '@' still split correctly
+        m = _NETLOC_RE.match(parsed.netloc)
+        if m:
+            u, p, host, prt = m.groups()
+            if u is not None:
                 username = unquote(u)
+            if p is not None:
                 password = unquote(p)
-            else:
-                username = unquote(userinfo)
-        else:
-            hostinfo = parsed.netloc
-        if ':' in hostinfo:
-            h, p = hostinfo.split(':', 1)
-            host = h
-            try:
-                port = int(p)
-            except Exception:
-                port = None
-        else:
-            host = hostinfo
+            if prt is not None:
+                try:
+                    port = int(prt)
+                except ValueError:
+                    port = None
 
     # path may start with /database
     database = parsed.path[1:] if parsed.path and parsed.path.startswith(
@@ -108,16 +361,16 @@ def parse_jdbc_url(jdbc_url: str) -> dict:
     for jkey in ('currentSchema', 'ssl', 'characterEncoding', 'TimeZone', 'serverTimezone'):
         params.pop(jkey, None)
 
-    return {
+    return MappingProxyType({
         'conn_type': conn_type,
         'host': host,
         'port': port,
         'database': database,
         'username': username,
         'password': password,
-        'params': params,
+        'params': tuple(params.items()),
         'schema': schema_val,
-    }
+    })
 
 
 class ConnectionManager:
@@ -125,40 +378,55 @@ class ConnectionManager:
 
     def __init__(self, config_path: Path | None = None):
         self._engines: Dict[str, Engine] = {}
+        self._engines_lock = threading.Lock()
         self._configs: Dict[str, Dict[str, Any]] = {}
+        # next suffix index to try per base name (see _unique_name)
+        self._name_counters: Dict[str, int] = {}
         self.config_path = Path(
             config_path) if config_path else DEFAULT_CONFIG_PATH
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        # Config writes are coalesced and done by a background thread started on first save
+        self._config_lock = threading.Lock()
+        self._save_queue: "queue.Queue[bool]" = queue.Queue(maxsize=1)
+        self._save_thread: threading.Thread | None = None
+        # names changed since the last write, and the encoded form of every written entry
+        self._dirty: set[str] = set()
+        self._write_cache: Dict[str, Any] = {}
+        self._last_serialized: bytes | None = None
         self._load_config()
+        # the first write has to encode every loaded entry
+        self._dirty.update(self._configs)
+        # metadata helpers (AI prompts, autocomplete) introspect this manager's engines
+        set_active_connection_manager(self)
 
     def _load_config(self) -> None:
         if not self.config_path.exists():
             return
-        # Try multiple encodings because users may have config written in other encodings on Windows
-        encodings_to_try = ("utf-8", "utf-8-sig", "cp936", "latin-1")
-        raw = None
-        for enc in encodings_to_try:
-            try:
-                with open(self.config_path, "r", encoding=enc) as f:
-                    raw = f.read()
-                # if read succeeded, try to parse JSON
-                data = json.loads(raw)
-                break
-            except (UnicodeDecodeError, json.JSONDecodeError):
-                raw = None
-                continue
-            except Exception:
-                # other IO errors: give up loading
-                raw = None
-                break
+        try:
+            raw = self.config_path.read_bytes()
+        except Exception:
+            # IO errors: give up loading
+            return
+        data = None
+        try:
+            data = _json_loads(raw)
+        except (UnicodeDecodeError, ValueError):
+            # Users may have a config written in another encoding on Windows; retry once per
+            # legacy encoding on the bytes already read instead of reopening the file
+            for enc in ("cp936", "latin-1"):
+                try:
+                    data = _json_loads(raw.decode(enc).encode("utf-8"))
+                    break
+                except (UnicodeDecodeError, ValueError):
+                    continue
 
-        if raw is None:
-            # backup the problematic config file and continue with empty configs
+        if data is None:
+            # backup the problematic config file (from the bytes already in memory) and
+            # continue with empty configs
             try:
                 bad_path = self.config_path.with_suffix(
                     self.config_path.suffix + ".bak")
-                with open(self.config_path, "rb") as fsrc, open(bad_path, "wb") as fdst:
-                    fdst.write(fsrc.read())
+                bad_path.write_bytes(raw)
             except Exception:
                 pass
             return
@@ -172,13 +440,7 @@ class ConnectionManager:
                 # Decode password saved with rot13 (best-effort). Keep other fields as-is.
                 try:
                     if isinstance(cfg, dict) and isinstance(cfg.get('password'), str):
-                        try:
-                            decoded = codecs.decode(
-                                cfg.get('password'), 'rot_13')
-                            cfg['password'] = decoded
-                        except Exception:
-                            # if decoding fails, keep original value
-                            pass
+                        cfg['password'] = cfg['password'].translate(_ROT13)
                 except Exception:
                     pass
                 # preserve config as-is; do not create or test engine now
@@ -195,29 +457,58 @@ class ConnectionManager:
             pass
 
     def _save_config(self) -> None:
+        """Schedule a config write; calls made while a write is pending collapse into it."""
+        if self._save_thread is None:
+            # the worker only gets a weak reference so an unused manager (and its engines)
+            # can still be collected; collecting it stops the worker
+            self._save_thread = threading.Thread(
+                target=_config_save_worker, args=(weakref.ref(self), self._save_queue),
+                name="config-save", daemon=True)
+            self._save_thread.start()
+            weakref.finalize(self, _stop_config_save_worker, self._save_queue)
+            _SAVING_MANAGERS.add(self)
         try:
-            # write all known configs
-            # Encode passwords using rot13 for simple obfuscation before writing
-            to_write: Dict[str, Any] = {}
-            for name, cfg in self._configs.items():
+            self._save_queue.put_nowait(True)
+        except queue.Full:
+            # a write is already pending and will pick up the latest configs
+            pass
+
+    def flush_config(self) -> None:
+        """Block until any scheduled config write has been completed."""
+        self._save_queue.join()
+
+    def _write_config(self) -> None:
+        try:
+            # Only entries changed since the last write are copied and re-encoded; the rest
+            # come from _write_cache, which is only touched by the writer thread.
+            with self._config_lock:
+                dirty, self._dirty = self._dirty, set()
+                changed = {name: self._configs.get(name) for name in dirty}
+            for name, cfg in changed.items():
+                if cfg is None:
+                    self._write_cache.pop(name, None)
+                    continue
+                # Encode passwords using rot13 for simple obfuscation before writing
                 try:
                     if isinstance(cfg, dict):
                         cfg_copy = dict(cfg)
                         if isinstance(cfg_copy.get('password'), str):
-                            try:
-                                cfg_copy['password'] = codecs.encode(
-                                    cfg_copy['password'], 'rot_13')
-                            except Exception:
-                                # if encoding fails, keep original
-                                pass
-                        to_write[name] = cfg_copy
+                            cfg_copy['password'] = cfg_copy['password'].translate(_ROT13)
+                        self._write_cache[name] = cfg_copy
                     else:
-                        to_write[name] = cfg
+                        self._write_cache[name] = cfg
                 except Exception:
-                    to_write[name] = cfg
-
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(to_write, f, indent=2)
+                    self._write_cache[name] = cfg
+
+            serialized = _json_dumps(self._write_cache)
+            if serialized == self._last_serialized:
+                # nothing changed on disk since the last write
+                return
+            # write to a temp file and swap it in so a crash never leaves a partial config
+            tmp_path = self.config_path.with_suffix(".tmp")
+            tmp_path.write_bytes(serialized)
+            os.replace(tmp_path, self.config_path)
+            self._last_serialized = serialized
         except Exception:
             # best-effort; ignore errors
             pass
@@ -240,27 +531,40 @@ class ConnectionManager:
             # Never raise from logging helper
             pass
 
+    def _unique_name(self, base: str) -> str:
+        """Return ``base`` or the first free ``"base (n)"`` name.
+
+        The next index to try is remembered per base name so repeated duplicates do not rescan
+        every previously issued suffix.
+        """
+        idx = self._name_counters.get(base, 0)
+        while True:
+            candidate = base if idx == 0 else f"{base} ({idx})"
+            idx += 1
+            if candidate not in self._engines and candidate not in self._configs:
+                self._name_counters[base] = idx
+                return candidate
+
     def add_sqlite_connection(self, path: str) -> str:
         """Add a SQLite connection by file path. Returns a connection name.
 
         This function will register the connection without forcing a live connect/test so the
         application remains responsive and does not attempt credential validation unexpectedly.
         """
-        if not os.path.exists(path):
+        # Resolve once and stat once; isfile also rejects directories
+        abs_path = os.path.abspath(path)
+        if not os.path.isfile(abs_path):
             raise FileNotFoundError(f"SQLite file not found: {path}")
-        name = f"SQLite: {os.path.basename(path)}"
-        if name in self._engines:
-            idx = 1
-            base = name
-            while name in self._engines:
-                name = f"{base} ({idx})"
-                idx += 1
-        url = f"sqlite:///{os.path.abspath(path)}"
-        engine = create_engine(url, future=True)
+        name = self._unique_name(f"SQLite: {os.path.basename(path)}")
+        engine = _create_sqlite_engine(abs_path)
+        # the file may have changed since it was last opened; drop any summary cached for it
+        clear_schema_cache(engine)
         # Do not perform an immediate test connect here per 'do not unittest' preference.
         self._engines[name] = engine
         # Persist only the page inputs; do NOT save the full URL string.
-        self._configs[name] = {"type": "sqlite", "path": os.path.abspath(path)}
+        with self._config_lock:
+            self._configs[name] = {"type": "sqlite", "path": abs_path}
+            self._dirty.add(name)
         self._save_config()
         return name
 
@@ -300,46 +604,26 @@ class ConnectionManager:
             except Exception as e:
                 raise RuntimeError(f"Failed to parse JDBC URL: {e}") from e
 
-        # Helper to coerce bytes/unicode inputs to str robustly
-        def _to_str_with_fallback(v):
-            if v is None:
-                return None
-            if isinstance(v, str):
-                return v
-            if isinstance(v, bytes):
-                for enc in ("utf-8", "utf-8-sig", "cp936", "latin-1"):
-                    try:
-                        return v.decode(enc)
-                    except Exception:
-                        continue
-                # last resort
-                return v.decode("utf-8", errors="replace")
-            try:
-                return str(v)
-            except Exception:
-                return None
-
-        # prefer 'user' key but accept normalized value from above
-        user = kwargs.get("user", "")
-        password = kwargs.get("password", "")
-        host = kwargs.get("host", "localhost")
-        port = kwargs.get("port", None)
-        db = kwargs.get("database", "")
+        # Take the connection fields out of kwargs in one pass; whatever remains (sslmode,
+        # options, ...) becomes URL query parameters.
+        fields = {k: kwargs.pop(k) for k in _CONNECTION_FIELDS if k in kwargs}
+        query_params = {k: str(v) for k, v in kwargs.items() if v is not None}
 
         # coerce inputs to safe str to avoid UnicodeDecodeError from drivers expecting text
-        user = _to_str_with_fallback(user) or None
-        password = _to_str_with_fallback(password) or None
-        host = _to_str_with_fallback(host) or None
-        db = _to_str_with_fallback(db) or None
+        user, password, host, db = (
+            _to_str_with_fallback(v) or None for v in (
+                fields.get("user", ""), fields.get("password", ""),
+                fields.get("host", "localhost"), fields.get("database", "")))
+        port = fields.get("port")
 
         if conn_type == "postgresql":
-            driver = kwargs.get("driver", "psycopg2")
+            driver = fields.get("driver") or "psycopg2"
             drivername = f"postgresql+{driver}"
             # port default
             if port is None:
                 port = 5432
         elif conn_type == "mysql":
-            driver = kwargs.get("driver", "pymysql")
+            driver = fields.get("driver") or "pymysql"
             drivername = f"mysql+{driver}"
             if port is None:
                 port = 3306
@@ -347,105 +631,46 @@ class ConnectionManager:
             raise ValueError(f"Unsupported connection type: {conn_type}")
 
         # Use SQLAlchemy URL.create to properly quote username/password and build URL object
+        schema_val = None
         try:
-            # collect extra kwargs as query parameters (e.g., sslmode, options)
-            query_params = {}
-            for k, v in kwargs.items():
-                if k in ("host", "port", "user", "password", "database", "driver", "jdbc"):
-                    continue
-                if v is None:
-                    continue
-                query_params[k] = str(v)
-
             # If the caller provided a schema/search_path for PostgreSQL, ensure it's applied via
             # the libpq 'options' parameter ("-c search_path=...") so the session default schema is set.
             if conn_type == "postgresql":
-                # Determine schema from explicit kwargs first, then from any parsed query params, then
-                # from options if present. We persist the canonical schema separately in the saved
-                # configuration so the UI/metadata fetcher can rely on it instead of parsing options.
-                schema_val = None
-                for schema_key in ("schema", "search_path", "currentSchema"):
-                    if kwargs.get(schema_key):
-                        schema_val = str(kwargs.get(schema_key))
+                # Determine schema from explicit fields first, then from options if present. We
+                # persist the canonical schema separately in the saved configuration so the
+                # UI/metadata fetcher can rely on it instead of parsing options.
+                for schema_key in _SCHEMA_KEYS:
+                    if fields.get(schema_key):
+                        schema_val = str(fields[schema_key])
                         break
-                # If not in kwargs, check query_params (e.g., if JDBC parsing populated them)
-                if not schema_val:
-                    for schema_key in ("schema", "search_path", "currentSchema"):
-                        if query_params.get(schema_key):
-                            schema_val = str(query_params.get(schema_key))
-                            break
                 # Finally, try to detect schema inside an existing 'options' value like
                 # "-c search_path=foo -c TimeZone=..."
                 if not schema_val and query_params.get('options'):
-                    import re
-
-                    m = re.search(
-                        r"search_path\s*=\s*([\w\",]+)", query_params.get('options'))
+                    m = _SEARCH_PATH_RE.search(query_params.get('options'))
                     if m:
                         schema_val = m.group(1).strip().strip('"')
 
                 # If we found a schema, ensure options contains -c search_path=... so libpq picks it up
                 if schema_val:
-                    existing_opts = query_params.get('options')
-                    schema_opt = f"-c search_path={schema_val}"
-                    query_params['options'] = (
-                        existing_opts + ' ' + schema_opt) if existing_opts else schema_opt
-
-                # Important: remove any schema-like keys from the query parameters so they are not
-                # passed verbatim to libpq/psycopg2 which rejects unknown dsn options like 'schema'.
-                for _k in ('schema', 'search_path', 'currentSchema'):
-                    query_params.pop(_k, None)
-
-            url_obj = URL.create(
-                drivername=drivername,
-                username=user or None,
-                password=password or None,
-                host=host or None,
-                port=int(port) if port else None,
-                database=db or None,
-                query=query_params or None,
+                    query_params['options'] = _with_search_path(
+                        query_params.get('options'), str(schema_val))
+
+            url_obj = _cached_url(
+                drivername,
+                user or None,
+                password or None,
+                host or None,
+                int(port) if port else None,
+                db or None,
+                tuple(sorted(query_params.items())),
             )
         except Exception as e:
             raise RuntimeError(f"Invalid connection parameters: {e}") from e
 
         # ensure unique display name
-        display_name = name
-        if display_name in self._engines or display_name in self._configs:
-            idx = 1
-            base = display_name
-            while display_name in self._engines or display_name in self._configs:
-                display_name = f"{base} ({idx})"
-                idx += 1
-
-        engine = create_engine(url_obj, future=True)
-
-        # If schema was provided for PostgreSQL, also attach a connect-time listener to ensure
-        # the search_path is set on DBAPI connections (covers drivers/hosts that ignore 'options').
-        try:
-            if conn_type == "postgresql":
-                schema_to_apply = None
-                for schema_key in ("schema", "search_path", "currentSchema"):
-                    if schema_key in kwargs and kwargs.get(schema_key):
-                        schema_to_apply = str(kwargs.get(schema_key))
-                        break
-                if schema_to_apply:
-                    from sqlalchemy import event
-
-                    def _set_search_path(dbapi_conn, connection_record):
-                        try:
-                            cur = dbapi_conn.cursor()
-                            # Use quoted identifier only if simple identifier; keep simple to avoid SQL injection
-                            # quote the schema value to produce a safe literal (e.g. 'schema')
-                            cur.execute(
-                                f"SET search_path TO {schema_to_apply!r}")
-                        except Exception:
-                            # best-effort; do not raise here
-                            pass
-
-                    event.listen(engine, "connect", _set_search_path)
-        except Exception:
-            # keep best-effort: do not fail connection creation if listener attachment fails
-            pass
+        display_name = self._unique_name(name)
+
+        engine = _create_engine(url_obj)
 
         # Do not perform an immediate test connect here. Engines are created but connections
         # will be validated when first used (get_connection). This keeps the UI responsive
@@ -461,254 +686,219 @@ class ConnectionManager:
         # a password was provided, persist it (insecure but requested). Storing plaintext passwords is
         # insecure; prefer system keyring instead for production. Persist the schema explicitly
         # so downstream metadata fetchers don't need to parse it out of 'options'.
-        cfg_vals = {k: v for k, v in kwargs.items() if k in (
-            "host", "port", "user", "database", "schema")}
+        cfg_vals = {k: fields[k] for k in ("host", "port", "user", "database", "schema") if k in fields}
         # ensure canonical keys
         cfg_vals["user"] = user
         # Persist password directly as requested (insecure but requested by user)
         cfg_vals["password"] = password
 
-        # Ensure schema is persisted reliably by computing a final_schema from multiple sources
-        final_schema = None
-        try:
-            # priority: explicit kwargs, earlier-detected schema_val (from above), query_params, options parsing
-            if kwargs.get('schema'):
-                final_schema = str(kwargs.get('schema'))
-            elif 'schema_val' in locals() and schema_val:
-                final_schema = str(schema_val)
-            else:
-                for schema_key in ('schema', 'search_path', 'currentSchema'):
-                    if query_params.get(schema_key):
-                        final_schema = str(query_params.get(schema_key))
-                        break
-                if not final_schema and query_params.get('options'):
-                    import re
-
-                    m = re.search(
-                        r"search_path\s*=\s*([\w\",]+)", query_params.get('options'))
-                    if m:
-                        final_schema = m.group(1).strip().strip('"')
-        except Exception:
-            final_schema = None
-
-        if final_schema:
-            cfg_vals['schema'] = final_schema
+        # Ensure schema is persisted reliably: an explicit 'schema' wins, otherwise whatever was
+        # detected above (only PostgreSQL uses a search_path, so other dialects skip this)
+        if conn_type == "postgresql":
+            final_schema = str(fields['schema']) if fields.get('schema') else schema_val
+            if final_schema:
+                cfg_vals['schema'] = final_schema
 
         # persist any query params (sslmode, options, etc.) for reproducibility
-        cfg_params = {k: v for k, v in query_params.items(
-        )} if 'query_params' in locals() else {}
+        cfg_params = dict(query_params)
         # Persist only page inputs and params; do not save the full URL string.
         # Keep driver so we can reconstruct the URL on load.
         cfg_record = {"type": conn_type, "driver": driver,
                       "params": cfg_params, **cfg_vals}
-        self._configs[display_name] = cfg_record
+        with self._config_lock:
+            self._configs[display_name] = cfg_record
+            self._dirty.add(display_name)
         self._save_config()
         return display_name
 
     def get_connection(self, name: str) -> Engine:
         """Return the SQLAlchemy Engine for the given connection name."""
-        if name not in self._engines:
-            # try to reconstruct from config; provide robust fallback when stored passwords
-            # may have been rot13-encoded or stored in different forms. Log exceptions so
-            # callers can diagnose why an engine wasn't created (without printing secrets).
-            if name in self._configs:
-                cfg = self._configs[name]
-                last_exc = None
-                try:
-                    engine = None
-                    # Build a list of candidate passwords to try: stored value and a rot13-decoded
-                    # variant. Many configs historically stored passwords using rot13 obfuscation.
-                    import codecs as _codecs
-
-                    raw_pw = cfg.get('password') if isinstance(
-                        cfg.get('password'), (str, bytes)) else None
-                    pw_candidates = [raw_pw]
-                    if isinstance(raw_pw, str):
-                        try:
-                            alt = _codecs.decode(raw_pw, 'rot_13')
-                            if alt != raw_pw:
-                                pw_candidates.append(alt)
-                        except Exception:
-                            pass
-
-                    # Try each password candidate until one succeeds
-                    for try_pw in pw_candidates:
-                        try:
-                            # Reconstruct engine from saved fields. Backwards-compat: if a legacy 'url'
-                            # exists in the config, use it directly.
-                            engine = None
-                            if isinstance(cfg.get('url'), str):
-                                engine = create_engine(cfg['url'], future=True)
-                            else:
-                                ctype = cfg.get('type')
-                                if ctype == 'sqlite':
-                                    path = cfg.get('path')
-                                    if not path:
-                                        raise RuntimeError(
-                                            'Missing sqlite path in config')
-                                    url = f"sqlite:///{os.path.abspath(path)}"
-                                    engine = create_engine(url, future=True)
-                                else:
-                                    drv = cfg.get('driver') or (
-                                        'psycopg2' if ctype == 'postgresql' else 'pymysql')
-                                    if ctype == 'postgresql':
-                                        drivername = f"postgresql+{drv}"
-                                    elif ctype == 'mysql':
-                                        drivername = f"mysql+{drv}"
-                                    else:
-                                        raise ValueError(
-                                            f"Unsupported connection type in config: {ctype}")
-
-                                    user = cfg.get('user') or None
-                                    password = try_pw or None
-                                    host = cfg.get('host') or None
-                                    port = int(cfg['port']) if cfg.get(
-                                        'port') else None
-                                    database = cfg.get(
-                                        'database') or cfg.get('db') or None
-                                    # Sanitize stored params: do not pass a top-level 'schema' or
-                                    # JDBC-like schema keys directly as libpq connection options.
-                                    # Instead map them into an 'options' value so psycopg2/libpq
-                                    # receives -c search_path=... which is valid.
-                                    raw_params = cfg.get('params') if isinstance(
-                                        cfg.get('params'), dict) else {}
-                                    query = dict(
-                                        raw_params) if raw_params else {}
-
-                                    # Extract schema from possible places: explicit top-level key or params
-                                    schema_val = None
-                                    if cfg.get('schema'):
-                                        schema_val = cfg.get('schema')
-                                    else:
-                                        for k in ('schema', 'search_path', 'currentSchema'):
-                                            if k in query:
-                                                schema_val = query.pop(k)
-                                                break
-
-                                    # If a schema was found, ensure it's passed via 'options' as -c search_path=...
-                                    if schema_val:
-                                        existing_opts = query.get('options')
-                                        schema_opt = f"-c search_path={schema_val}"
-                                        query['options'] = (
-                                            existing_opts + ' ' + schema_opt) if existing_opts else schema_opt
-
-                                    # Remove any accidental 'schema' key left in params to avoid invalid dsn
-                                    query.pop('schema', None)
-
-                                    url_obj = URL.create(
-                                        drivername=drivername,
-                                        username=user,
-                                        password=password,
-                                        host=host,
-                                        port=port,
-                                        database=database,
-                                        query=query or None,
-                                    )
-                                    engine = create_engine(url_obj, future=True)
-
-                            # If a schema was saved for a PostgreSQL connection, attach a connect listener
-                            # so the reconstructed engine applies the saved search_path to sessions.
-                            try:
-                                if cfg.get('type') == 'postgresql' and engine is not None:
-                                    # Prefer explicit 'schema' key if present
-                                    schema_to_apply = cfg.get('schema')
-
-                                    # If not present, try to detect from stored params (e.g. options='-c search_path=...')
-                                    if not schema_to_apply and isinstance(cfg.get('params'), dict):
-                                        params = cfg.get('params', {})
-                                        for k in ('schema', 'search_path', 'currentSchema'):
-                                            if params.get(k):
-                                                schema_to_apply = params.get(k)
-                                                break
-                                        if not schema_to_apply and params.get('options'):
-                                            import re as _re
-
-                                            opts = params.get('options')
-                                            m = _re.search(
-                                                r"search_path\s*=\s*([\w\",]+)", opts)
-                                            if m:
-                                                schema_to_apply = m.group(
-                                                    1).strip().strip('"')
-
-                                    if schema_to_apply and engine is not None:
-                                        from sqlalchemy import event
-
-                                        def _set_search_path(dbapi_conn, connection_record):
-                                            try:
-                                                cur = dbapi_conn.cursor()
-                                                cur.execute(
-                                                    f"SET search_path TO {schema_to_apply!r}")
-                                            except Exception:
-                                                pass
-
-                                        event.listen(
-                                            engine, 'connect', _set_search_path)
-                            except Exception:
-                                # best-effort; do not fail engine reconstruction for metadata-only configs
-                                pass
-
-                            # Perform the quick connect attempt in a separate thread with a timeout so
-                            # slow network/driver behavior cannot block the caller indefinitely.
-                            import threading
-
-                            connect_result = {'ok': False, 'error': None}
-
-                            def _try_connect():
-                                try:
-                                    with engine.connect() as conn:
-                                        pass
-                                    connect_result['ok'] = True
-                                except Exception as e:
-                                    connect_result['error'] = e
-
-                            thr = threading.Thread(target=_try_connect, daemon=True)
-                            thr.start()
-                            thr.join(5)  # short timeout for responsiveness
-                            if not connect_result['ok']:
-                                last_exc = connect_result['error'] or RuntimeError(
-                                    f"Connection test timed out after 5s for '{name}'")
-                                try:
-                                    engine.dispose()
-                                except Exception:
-                                    pass
-                                engine = None
-                                logger.debug(
-                                    "Connection test failed or timed out for '%s' with a password candidate: %s", name, last_exc)
-                                continue
-
-                            # success
-                            self._engines[name] = engine
-                            # Log a sanitized connection URL for diagnostics (password hidden)
-                            try:
-                                self._log_engine_url(name, engine)
-                            except Exception:
-                                pass
-                            engine = None
-                            break
-                        except Exception as e:
-                            last_exc = e
-                            logger.debug(
-                                "Engine construction attempt failed for '%s': %s", name, e, exc_info=True)
-                            try:
-                                if engine is not None:
-                                    engine.dispose()
-                            except Exception:
-                                pass
-                            engine = None
-                            continue
-
-                    if name not in self._engines:
-                        logger.debug(
-                            "All engine reconstruction attempts failed for '%s'; last error: %r", name, last_exc)
-                except Exception:
-                    # keep best-effort: do not fail engine reconstruction for metadata-only configs
-                    pass
+        engine = self._engines.get(name)
+        if engine is None and name in self._configs:
+            # Reconstruct from config. Double-checked under the lock so concurrent first calls
+            # (e.g. parallel metadata loads) build and test the engine only once.
+            with self._engines_lock:
+                engine = self._engines.get(name)
+                if engine is None:
+                    try:
+                        engine = self._build_engine_from_cfg(name, self._configs[name])
+                    except Exception:
+                        # keep best-effort: do not fail engine reconstruction for metadata-only configs
+                        engine = None
+                    if engine is not None:
+                        self._engines[name] = engine
         # If after reconstruction there is still no engine, raise a clear error so callers can
         # handle the missing-engine case instead of getting a KeyError.
-        if name not in self._engines:
+        if engine is None:
             raise RuntimeError(
                 f"Connection '{name}' is not available (engine was not created)")
-        return self._engines[name]
+        return engine
+
+    def describe(self, engine: Engine | str, tables=()) -> SchemaDescription:
+        """Return the cached schema description of engine (or of the named connection).
+
+        Details are loaded for tables on top of the table/view lists; see db.metadata.describe.
+        """
+        if isinstance(engine, str):
+            engine = self.get_connection(engine)
+        return describe(engine, tables)
+
+    def _build_engine_from_cfg(self, name: str, cfg: Dict[str, Any]) -> Engine | None:
+        """Build and connect-test an engine from a saved config; None if every attempt fails.
+
+        Provides a robust fallback when stored passwords may have been rot13-encoded or stored
+        in different forms. Exceptions are logged so callers can diagnose why an engine wasn't
+        created (without printing secrets).
+        """
+        # Fail fast on a dead endpoint before building any engine; reachability does not depend
+        # on which password candidate is used
+        address = _probe_address(cfg)
+        if address is not None and not _tcp_reachable(*address):
+            logger.debug("Host %s:%s for '%s' is not reachable; skipping connect attempts",
+                         address[0], address[1], name)
+            return None
+
+        try:
+            engine = self._engine_from_cfg(cfg)
+        except Exception as e:
+            logger.debug(
+                "Engine construction failed for '%s': %s", name, e, exc_info=True)
+            return None
+
+        # Build a list of candidate passwords to try: stored value and a rot13-decoded
+        # variant. Many configs historically stored passwords using rot13 obfuscation.
+        # Only configs built from saved fields take their password from the config.
+        pw_candidates = [None]
+        raw_pw = cfg.get('password') if isinstance(
+            cfg.get('password'), (str, bytes)) else None
+        if engine.dialect.name != 'sqlite' and not isinstance(cfg.get('url'), str):
+            pw_candidates = [raw_pw]
+            if isinstance(raw_pw, str):
+                alt = raw_pw.translate(_ROT13)
+                if alt != raw_pw:
+                    pw_candidates.append(alt)
+
+        # All candidates share this one engine: the password is swapped in per connection
+        # attempt instead of building (and disposing) an engine for each candidate
+        current_pw = {'value': None}
+        if pw_candidates != [None]:
+            from sqlalchemy import event
+
+            @event.listens_for(engine, 'do_connect')
+            def _use_candidate_password(dialect, conn_rec, cargs, cparams):
+                key = 'passwd' if 'passwd' in cparams else 'password'
+                if current_pw['value']:
+                    cparams[key] = current_pw['value']
+                else:
+                    cparams.pop(key, None)
+
+        last_exc = None
+        for try_pw in pw_candidates:
+            current_pw['value'] = try_pw
+            # Quick connect test; the driver-level connect timeout keeps slow networks
+            # from blocking the caller
+            try:
+                with engine.connect():
+                    pass
+            except Exception as e:
+                last_exc = e
+                logger.debug(
+                    "Connection test failed for '%s' with a password candidate: %s", name, last_exc)
+                continue
+
+            # success; keep engine.url in line with the password that worked (pg_dump reads it)
+            if try_pw is not None:
+                engine.url = engine.url.set(password=try_pw or None)
+            # Log a sanitized connection URL for diagnostics (password hidden)
+            try:
+                self._log_engine_url(name, engine)
+            except Exception:
+                pass
+            return engine
+
+        try:
+            engine.dispose()
+        except Exception:
+            pass
+        logger.debug(
+            "All engine reconstruction attempts failed for '%s'; last error: %r", name, last_exc)
+        return None
+
+    @staticmethod
+    def _engine_from_cfg(cfg: Dict[str, Any]) -> Engine:
+        """Create (without connecting) the engine described by a saved config.
+
+        Saved-field configs get no password in the URL; _build_engine_from_cfg supplies it per
+        connection attempt.
+        """
+        # Reconstruct engine from saved fields. Backwards-compat: if a legacy 'url'
+        # exists in the config, use it directly.
+        if isinstance(cfg.get('url'), str):
+            connect_args = {}
+            url_obj = make_url(cfg['url'])
+            # A saved schema travels in the startup packet via libpq options
+            if (cfg.get('type') == 'postgresql' and cfg.get('schema')
+                    and 'options' not in url_obj.query):
+                connect_args['options'] = _search_path_option(str(cfg['schema']))
+            return _create_engine(url_obj, connect_args=connect_args)
+        else:
+            ctype = cfg.get('type')
+            if ctype == 'sqlite':
+                path = cfg.get('path')
+                if not path:
+                    raise RuntimeError(
+                        'Missing sqlite path in config')
+                return _create_sqlite_engine(
+                    path if path == ':memory:' else os.path.abspath(path))
+            else:
+                drv = cfg.get('driver') or (
+                    'psycopg2' if ctype == 'postgresql' else 'pymysql')
+                if ctype == 'postgresql':
+                    drivername = f"postgresql+{drv}"
+                elif ctype == 'mysql':
+                    drivername = f"mysql+{drv}"
+                else:
+                    raise ValueError(
+                        f"Unsupported connection type in config: {ctype}")
+
+                user = cfg.get('user') or None
+                host = cfg.get('host') or None
+                port = int(cfg['port']) if cfg.get(
+                    'port') else None
+                database = cfg.get(
+                    'database') or cfg.get('db') or None
+                # Sanitize stored params: do not pass a top-level 'schema' or
+                # JDBC-like schema keys directly as libpq connection options.
+                # Instead map them into an 'options' value so psycopg2/libpq
+                # receives -c search_path=... which is valid.
+                raw_params = cfg.get('params') if isinstance(
+                    cfg.get('params'), dict) else {}
+                query = dict(
+                    raw_params) if raw_params else {}
+
+                if ctype == 'postgresql':
+                    # Extract schema from possible places: explicit top-level key or params
+                    schema_val = None
+                    if cfg.get('schema'):
+                        schema_val = cfg.get('schema')
+                    else:
+                        for k in ('schema', 'search_path', 'currentSchema'):
+                            if k in query:
+                                schema_val = query.pop(k)
+                                break
+
+                    # If a schema was found, ensure it's passed via 'options' as -c search_path=...
+                    if schema_val:
+                        query['options'] = _with_search_path(query.get('options'), str(schema_val))
+
+                # Remove any accidental 'schema' key left in params to avoid invalid dsn
+                query.pop('schema', None)
+
+                url_obj = _cached_url(
+                    drivername, user, None, host, port, database,
+                    tuple(sorted(query.items())))
+                return _create_engine(url_obj)
+
 
     def list_connections(self) -> list:
         # merge keys from configs and engines to preserve configs without live engine
@@ -723,11 +913,17 @@ class ConnectionManager:
 
     def remove_connection(self, name: str) -> None:
         if name in self._engines:
+            # editing a connection removes and re-adds it, so this also covers reconfiguration
+            clear_schema_cache(self._engines[name])
             try:
                 self._engines[name].dispose()
             except Exception:
                 pass
             del self._engines[name]
         if name in self._configs:
-            del self._configs[name]
+            with self._config_lock:
+                del self._configs[name]
+                self._dirty.add(name)
             self._save_config()
+        # a freed name may be reused, so restart suffix searches from the base name
+        self._name_counters.clear()
@@ -1,154 +1,449 @@
 from typing import List, Tuple, Optional, Dict, Any
 from sqlalchemy.engine import Engine
+import functools
+import re
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, wait as futures_wait
+
+from .metadata import clear_schema_cache
 
 # Per-statement execution timeout (seconds) to avoid indefinite blocking by DB drivers.
 _EXECUTION_TIMEOUT = 30
+# How often a running statement re-checks stop_event; cancellation is rare so this can be coarse.
+_CANCEL_CHECK_INTERVAL = 0.5
+# Seconds to wait for a natively cancelled statement to return before dropping the connection
+_CANCEL_GRACE_PERIOD = 2.0
+
+# Quoted strings/identifiers, comments and dollar-quoted bodies are matched whole so a ';'
+# inside them is never treated as a statement separator. Backslash escapes in '...' are
+# MySQL-only; elsewhere only E'...' literals (PostgreSQL) honour them.
+_STATEMENT_TOKEN_PATTERN = (
+    r"%s"
+    r'|"(?:""|[^"])*"'
+    r"|`[^`]*`"
+    r"|(--[^\n]*|/\*.*?\*/)"
+    r"|\$(\w*)\$.*?\$\2\$"
+    r"|;"
+)
+_STATEMENT_TOKEN_RE = re.compile(
+    _STATEMENT_TOKEN_PATTERN % r"""(?<![\w$])[Ee]'(?:''|\\.|[^'\\])*'|'(?:''|[^'])*'""", re.S)
+_MYSQL_STATEMENT_TOKEN_RE = re.compile(
+    _STATEMENT_TOKEN_PATTERN % r"""'(?:''|\\.|[^'\\])*'""", re.S)
+
+# Plain queries (after any leading comments) that may run on a server-side cursor; DML and
+# data-modifying CTEs cannot be DECLAREd as cursors on PostgreSQL so they are not streamed
+_STREAMABLE_RE = re.compile(r"(?:\s+|--[^\n]*|/\*.*?\*/)*(?:SELECT|VALUES|TABLE)\b", re.I | re.S)
+# SELECT ... INTO creates a table (or assigns variables) and cannot be DECLAREd either; the
+# keyword is looked for outside quotes and comments
+_NON_CODE_RE = re.compile(r"""'(?:''|[^'])*'|"(?:""|[^"])*"|`[^`]*`|--[^\n]*|/\*.*?\*/|\$(\w*)\$.*?\$\1\$""", re.S)
+_INTO_RE = re.compile(r"\bINTO\b", re.I)
+
+# Statements after which cached schema summaries may be stale (DDL, or switching schema/database)
+_SCHEMA_CHANGE_RE = re.compile(
+    r"(?:\s+|--[^\n]*|/\*.*?\*/)*(?:CREATE|ALTER|DROP|RENAME|COMMENT\s+ON|USE|SET\s+(?:SESSION\s+|LOCAL\s+)?search_path)\b",
+    re.I | re.S)
+
+
+@functools.lru_cache(maxsize=512)
+def _is_streamable(stmt: str) -> bool:
+    """Whether stmt may run on a server-side cursor; memoized per statement text."""
+    if _STREAMABLE_RE.match(stmt) is None:
+        return False
+    return _INTO_RE.search(_NON_CODE_RE.sub(" ", stmt)) is None
+
+
+def split_statements(sql: str, dialect: Optional[str] = None) -> List[str]:
+    """Split a SQL script into statements on ';', ignoring separators inside quotes and comments.
+
+    Fragments that contain only whitespace or comments are dropped. dialect is the SQLAlchemy
+    dialect name; backslash escapes inside '...' are only recognised for MySQL/MariaDB.
+    """
+    return list(_split_statements_cached(sql, dialect in ("mysql", "mariadb")))
+
+
+@functools.lru_cache(maxsize=128)
+def _split_statements_cached(sql: str, backslash_escapes: bool = False) -> Tuple[str, ...]:
+    """Scanner behind split_statements; memoized since users often re-run the same script."""
+    token_re = _MYSQL_STATEMENT_TOKEN_RE if backslash_escapes else _STATEMENT_TOKEN_RE
+    statements: List[str] = []
+    start = 0
+    pos = 0
+    has_code = False
+    for m in token_re.finditer(sql):
+        if not has_code and m.start() > pos and not sql[pos:m.start()].isspace():
+            has_code = True
+        pos = m.end()
+        if m.group(0) == ";":
+            if has_code:
+                statements.append(sql[start:m.start()].strip())
+            start = pos
+            has_code = False
+        elif m.group(1) is None:
+            has_code = True
+    if has_code or (pos < len(sql) and not sql[pos:].isspace()):
+        statements.append(sql[start:].strip())
+    return tuple(statements)
+
+
+def _native_cancel(engine: Engine, conn) -> bool:
+    """Ask the server/driver to stop the statement running on conn; True if a cancel was sent.
+
+    Uses psycopg's cancel_safe()/cancel(), sqlite3's interrupt(), or KILL QUERY from a sibling
+    connection for MySQL.
+    """
+    try:
+        raw = conn.connection.dbapi_connection
+    except Exception:
+        return False
+    try:
+        if hasattr(raw, "cancel_safe"):
+            raw.cancel_safe()
+        elif hasattr(raw, "cancel"):
+            raw.cancel()
+        elif hasattr(raw, "interrupt"):
+            raw.interrupt()
+        elif engine.dialect.name in ("mysql", "mariadb") and hasattr(raw, "thread_id"):
+            thread_id = int(raw.thread_id())
+            with engine.connect() as killer:
+                killer.exec_driver_sql(f"KILL QUERY {thread_id}")
+        else:
+            return False
+        return True
+    except Exception:
+        return False
+
+
+def _cancel_statement(engine: Engine, conn, fut) -> None:
+    """Stop the statement behind fut, preferring a driver-native cancel over dropping the connection."""
+    if _native_cancel(engine, conn):
+        try:
+            fut.result(timeout=_CANCEL_GRACE_PERIOD)
+            return
+        except FuturesTimeoutError:
+            pass
+        except Exception:
+            # the statement was aborted by the cancel, as intended
+            return
+    _abort_connection(conn)
+
 
-def execute_sql(engine: Engine, sql: str, stop_event: Optional[threading.Event] = None, row_limit: int = 1000) -> List[Tuple[List[str], List[Tuple], float, bool]]:
+def _abort_connection(conn) -> None:
+    """Best-effort attempt to interrupt an in-flight statement; some drivers may still block.
+
+    The connection is invalidated rather than just closed, so the pool discards it instead of
+    handing a connection that a worker may still be using to the next caller.
+    """
+    try:
+        conn.invalidate()
+    except Exception:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# Statements still running after their execute_sql call gave up on them (timeout/cancel),
+# mapped to their connection; entries remove themselves when the worker finally returns
+_stranded: Dict[Any, Any] = {}
+_stranded_lock = threading.Lock()
+
+
+def _track_stranded(fut, conn) -> None:
+    """Remember a still-running statement until its worker returns."""
+    with _stranded_lock:
+        _stranded[fut] = conn
+
+    def _forget(done_fut):
+        with _stranded_lock:
+            _stranded.pop(done_fut, None)
+
+    fut.add_done_callback(_forget)
+
+
+def cleanup_executor_workers(timeout: float = 2.0) -> int:
+    """Abort statements left running by timed-out/cancelled execute_sql calls and wait for them.
+
+    Call this at application shutdown: pool worker threads are joined at interpreter exit, so a
+    statement stuck in a driver call would otherwise keep the process alive. Returns the number
+    of workers still running after timeout.
+    """
+    with _stranded_lock:
+        pending = dict(_stranded)
+    for conn in pending.values():
+        _abort_connection(conn)
+    if pending:
+        _, not_done = futures_wait(list(pending), timeout=timeout)
+        return len(not_done)
+    return 0
+
+
+def execute_sql(engine: Engine, sql: str, stop_event: Optional[threading.Event] = None, row_limit: int = 1000,
+                time_each: bool = True) -> List[Tuple[List[str], List[Tuple], Optional[float], bool]]:
     """Execute SQL (possibly multiple statements separated by ';') and return list of (columns, rows, elapsed_seconds, truncated).
 
     Each result is a tuple: (column_names: List[str], rows: List[Tuple], elapsed_seconds: float, truncated: bool)
+    Rows are the driver's tuple-like row objects, not copied into plain tuples.
     Non-SELECT statements produce a single-row message with affected rowcount (truncated=False).
 
     stop_event: optional threading.Event that, if set, will stop execution before starting the next statement or will attempt
-    to cancel an in-flight statement by closing the connection. Note this is best-effort; some DB drivers may not be
-    interruptible from another thread.
+    to cancel an in-flight statement through the driver's cancel API, falling back to closing the connection. Note this is
+    best-effort; some DB drivers may not be interruptible from another thread.
     row_limit: maximum number of rows to fetch for result sets. Additional rows are discarded to avoid excessive memory use.
+    time_each: time every statement (default). When False, only the whole script is timed: each result reports
+    elapsed_seconds=None except the last, which carries the total for the script.
     """
-    statements = [s.strip() for s in sql.split(";") if s.strip()]
-    results: List[Tuple[List[str], List[Tuple], float, bool]] = []
+    statements = _split_statements_cached(sql, engine.dialect.name in ("mysql", "mariadb"))
+    results: List[Tuple[List[str], List[Tuple], Optional[float], bool]] = []
     if not statements:
         return results
 
-    with engine.connect() as conn:
-        for stmt in statements:
-            if stop_event and stop_event.is_set():
-                raise RuntimeError("Execution canceled")
-
-            # Holder to receive the execution outcome from the worker thread
-            outcome = {"value": None, "error": None}
-
-            def _run_statement():
-                try:
-                    start = time.perf_counter()
-                    res = conn.exec_driver_sql(stmt)
-
-                    if res.returns_rows:
-                        cols = list(res.keys())
-                        # fetch up to row_limit + 1 to detect truncation
-                        try:
-                            fetched = res.fetchmany(row_limit + 1)
-                        except Exception:
-                            fetched = res.fetchall()
-
-                        truncated = False
-                        if isinstance(fetched, list) and len(fetched) > row_limit:
-                            truncated = True
-                            fetched = fetched[:row_limit]
-
-                        rows = [tuple(r) for r in fetched]
-                        elapsed = time.perf_counter() - start
-                        outcome["value"] = (cols, rows, elapsed, truncated)
-                    else:
-                        elapsed = time.perf_counter() - start
-                        msg = f"Affected rows: {res.rowcount}"
-                        outcome["value"] = (["Message"], [(msg,)], elapsed, False)
-                except Exception as e:
-                    outcome["error"] = e
-
-            thr = threading.Thread(target=_run_statement, daemon=True)
-            thr.start()
-
-            # Wait for thread to finish, timeout, or cancellation
-            waited = 0.0
-            interval = 0.1
-            while thr.is_alive():
-                thr.join(interval)
-                waited += interval
+    def _run_statement(conn, stmt: str) -> Tuple[List[str], List[Tuple], Optional[float], bool]:
+        start = time.perf_counter() if time_each else None
+        if _is_streamable(stmt):
+            # Server-side cursor where the driver supports it, so only about row_limit rows
+            # cross the wire instead of the whole result set
+            # options are per statement: Connection.execution_options() would modify conn itself
+            # and every later statement in the script would run on a server-side cursor too
+            res = conn.exec_driver_sql(stmt, execution_options={
+                "stream_results": True, "max_row_buffer": row_limit + 1})
+        else:
+            res = conn.exec_driver_sql(stmt)
+
+        if res.returns_rows:
+            cols = list(res.keys())
+            # fetch row_limit rows, then peek one more to detect truncation
+            try:
+                fetched = res.fetchmany(row_limit)
+                truncated = res.fetchone() is not None
+            except Exception:
+                fetched = res.fetchall()
+                truncated = len(fetched) > row_limit
+                fetched = fetched[:row_limit]
+            finally:
+                res.close()
+
+            # Rows are already tuple-like (indexable, iterable); hand them over without copying
+            elapsed = time.perf_counter() - start if time_each else None
+            return (cols, fetched, elapsed, truncated)
+        elapsed = time.perf_counter() - start if time_each else None
+        msg = f"Affected rows: {res.rowcount}"
+        return (["Message"], [(msg,)], elapsed, False)
+
+    script_start = None if time_each else time.perf_counter()
+    # One worker thread is reused for every statement in the script
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sql-exec")
+    fut = None
+    conn = None
+    schema_changed = False
+    try:
+        with engine.connect() as conn:
+            for stmt in statements:
                 if stop_event and stop_event.is_set():
-                    # best-effort attempt to cancel by closing connection; some drivers may still block
-                    try:
-                        conn.close()
-                    except Exception:
-                        try:
-                            conn.invalidate()
-                        except Exception:
-                            pass
                     raise RuntimeError("Execution canceled")
-                if waited >= _EXECUTION_TIMEOUT:
-                    # timed out; attempt to close connection to interrupt driver
+
+                # even a failed or canceled DDL statement may have been partly applied
+                schema_changed = schema_changed or _SCHEMA_CHANGE_RE.match(stmt) is not None
+                fut = pool.submit(_run_statement, conn, stmt)
+
+                # Wait for the statement to finish; without a stop_event this is a single wait
+                deadline = time.monotonic() + _EXECUTION_TIMEOUT
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        # timed out; ask the server to stop the statement
+                        _cancel_statement(engine, conn, fut)
+                        raise RuntimeError(f"Execution timed out after {_EXECUTION_TIMEOUT} seconds for statement: {stmt}")
+                    wait_for = remaining if stop_event is None else min(remaining, _CANCEL_CHECK_INTERVAL)
                     try:
-                        conn.close()
-                    except Exception:
-                        try:
-                            conn.invalidate()
-                        except Exception:
-                            pass
-                    raise RuntimeError(f"Execution timed out after {_EXECUTION_TIMEOUT} seconds for statement: {stmt}")
-
-            # Thread finished
-            if outcome["error"]:
-                # raise with context so UI can display
-                raise RuntimeError(f"Error executing statement: {stmt}\n{outcome['error']}") from outcome["error"]
-
-            if outcome["value"] is not None:
-                results.append(outcome["value"])
-            else:
-                # Defensive fallback
-                raise RuntimeError(f"Unknown execution failure for statement: {stmt}")
+                        value = fut.result(timeout=wait_for)
+                        break
+                    except FuturesTimeoutError:
+                        pass
+                    except Exception as e:
+                        # raise with context so UI can display
+                        raise RuntimeError(f"Error executing statement: {stmt}\n{e}") from e
+                    if stop_event is not None and stop_event.is_set():
+                        _cancel_statement(engine, conn, fut)
+                        raise RuntimeError("Execution canceled")
+
+                results.append(value)
+    finally:
+        # don't block on a worker stuck in a driver call after timeout/cancel, but keep track
+        # of it so cleanup_executor_workers() can reap it
+        if fut is not None and not fut.done():
+            _track_stranded(fut, conn)
+        pool.shutdown(wait=False)
+        if schema_changed:
+            clear_schema_cache(engine)
 
+    if script_start is not None:
+        cols, rows, _, truncated = results[-1]
+        results[-1] = (cols, rows, time.perf_counter() - script_start, truncated)
     return results
 
 
 from sqlalchemy import table as sa_table, column as sa_column, update as sa_update, delete as sa_delete, bindparam, and_, text
 
 
-def apply_updates(engine, table_name: str, pending_items: list) -> int:
+def _pk_clauses(pk_spec: tuple) -> list:
+    """WHERE clauses for ((column, is_null), ...); non-NULL columns bind to pk_<index>."""
+    clauses = []
+    for j, (pcol, is_null) in enumerate(pk_spec):
+        if is_null:
+            clauses.append(sa_column(pcol).is_(None))
+        else:
+            clauses.append(sa_column(pcol) == bindparam(f"pk_{j}"))
+    return clauses
+
+
+@functools.lru_cache(maxsize=64)
+def _param_names(prefix: str, count: int) -> Tuple[str, ...]:
+    """Bind parameter names <prefix>_0 .. <prefix>_<count-1>, built once per size."""
+    return tuple(f"{prefix}_{i}" for i in range(count))
+
+
+def _pk_params(pk: dict, params: dict) -> tuple:
+    """Fill pk_<index> params for non-NULL key values and return the matching pk_spec."""
+    for pname, pval in zip(_param_names("pk", len(pk)), pk.values()):
+        if pval is not None:
+            params[pname] = pval
+    return tuple((pcol, pval is None) for pcol, pval in pk.items())
+
+
+@functools.lru_cache(maxsize=256)
+def _build_update_stmt(table_name: str, change_cols: tuple, pk_spec: tuple):
+    """UPDATE statement binding changed columns to v_<index>; cached per table and column set."""
+    # Build a lightweight Table object with the necessary columns
+    cols = list({*change_cols, *(pcol for pcol, _ in pk_spec)})
+    tbl = sa_table(table_name, *[sa_column(c) for c in cols])
+    values = {col: bindparam(f"v_{i}") for i, col in enumerate(change_cols)}
+    return sa_update(tbl).where(and_(*_pk_clauses(pk_spec))).values(**values)
+
+
+@functools.lru_cache(maxsize=256)
+def _build_delete_stmt(table_name: str, pk_spec: tuple):
+    """DELETE statement for one row; cached per table and key column set."""
+    tbl = sa_table(table_name, *[sa_column(pcol) for pcol, _ in pk_spec])
+    return sa_delete(tbl).where(and_(*_pk_clauses(pk_spec)))
+
+
+# Rows per UPDATE ... FROM (VALUES ...) statement on the psycopg2 fast path
+_VALUES_PAGE_SIZE = 500
+
+
+def _pg_column_types(conn, table_name: str) -> Dict[str, str]:
+    """Column name -> SQL type of a PostgreSQL table; empty if the table can't be resolved."""
+    # Quoted as a single identifier, the same way sa_table() renders it
+    quoted = '"' + table_name.replace('"', '""') + '"'
+    # to_regclass() yields NULL instead of raising, so a miss doesn't abort the transaction.
+    # Types are taken without their modifier: an explicit ::varchar(20) cast would silently
+    # truncate, while assigning to the column enforces its length/precision as a plain UPDATE does
+    rows = conn.exec_driver_sql(
+        "SELECT a.attname, format_type(a.atttypid, NULL) FROM pg_attribute a "
+        "WHERE a.attrelid = to_regclass(%(rel)s) AND a.attnum > 0 AND NOT a.attisdropped",
+        {"rel": quoted}).fetchall()
+    return {name: typ for name, typ in rows}
+
+
+def _pg_update_from_values(conn, table_name: str, col_types: Dict[str, str], change_cols: tuple,
+                           pk_spec: tuple, param_list: List[Dict[str, Any]]) -> Optional[int]:
+    """Apply a batch as UPDATE ... FROM (VALUES ...) with psycopg2's execute_values.
+
+    Every VALUES column is cast to its target column's type, since grid edits arrive as untyped
+    literals. Returns rows updated, or None if a column's type is unknown (caller falls back).
+    """
+    from psycopg2.extras import execute_values
+
+    pk_cols = tuple(pcol for pcol, _ in pk_spec)
+    if any(c not in col_types for c in change_cols + pk_cols):
+        return None
+    # the dialect's preparer already doubles '%' in identifiers for psycopg2's placeholders;
+    # type names are escaped here
+    quote = conn.dialect.identifier_preparer.quote
+    types = {c: col_types[c].replace("%", "%%") for c in change_cols + pk_cols}
+    v_names = _param_names("v", len(change_cols))
+    pk_names = _param_names("pk", len(pk_cols))
+    sets = ", ".join(f"{quote(c)} = data.{v}::{types[c]}" for c, v in zip(change_cols, v_names))
+    where = " AND ".join(f"t.{quote(c)} = data.{p}::{types[c]}" for c, p in zip(pk_cols, pk_names))
+    sql = (f"UPDATE {quote(table_name)} AS t SET {sets} FROM (VALUES %s) "
+           f"AS data({', '.join(v_names + pk_names)}) WHERE {where}")
+
+    names = v_names + pk_names
+    rows = [tuple(params[n] for n in names) for params in param_list]
+    cur = conn.connection.dbapi_connection.cursor()
+    total = 0
+    try:
+        for i in range(0, len(rows), _VALUES_PAGE_SIZE):
+            page = rows[i:i + _VALUES_PAGE_SIZE]
+            execute_values(cur, sql, page, page_size=len(page))
+            total += max(cur.rowcount, 0)
+    finally:
+        cur.close()
+    return total
+
+
+def _display_str(value: Any) -> str:
+    """Value as the grid shows it; edits arrive as strings while loaded values keep their type."""
+    return "" if value is None else str(value)
+
+
+def apply_updates(engine, table_name: str, pending_items: list, atomic: bool = True) -> int:
     """Apply a list of pending update items against the given engine using SQLAlchemy Core.
 
-    pending_items is a list of dicts with keys 'changes' and 'pk'. Returns total rows affected.
+    pending_items is a list of dicts with keys 'changes' and 'pk', and optionally 'original' (the
+    loaded values of the changed columns); columns whose new value matches the original by display
+    string (as TableModel.setData compares them) are not written, and items left with no changes are skipped. Returns total rows affected.
     This avoids manual quoting by using sa.table/sa.column and bindparams.
+    atomic: apply everything in one transaction (default). When False each batch is committed
+    as it runs (autocommit), so row locks are released sooner but a failure keeps earlier batches.
     """
     total = 0
     if not pending_items:
         return 0
-    with engine.begin() as conn:
-        for item in pending_items:
-            changes = item.get('changes') or {}
-            pk = item.get('pk') or {}
-            if not changes or not pk:
-                continue
-
-            # Build a lightweight Table object with the necessary columns
-            cols = list({*changes.keys(), *pk.keys()})
-            tbl = sa_table(table_name, *[sa_column(c) for c in cols])
-
-            # Build values mapping and params
-            values = {}
-            params = {}
-            for i, (col, val) in enumerate(changes.items()):
-                pname = f"v_{i}"
-                values[col] = bindparam(pname)
-                params[pname] = val
-
-            # Build WHERE clauses
-            clauses = []
-            for j, (pcol, pval) in enumerate(pk.items()):
-                pname = f"pk_{j}"
-                if pval is None:
-                    clauses.append(sa_column(pcol).is_(None))
-                else:
-                    clauses.append(sa_column(pcol) == bindparam(pname))
-                    params[pname] = pval
-
-            stmt = sa_update(tbl).where(and_(*clauses)).values(**values)
-            res = conn.execute(stmt, params)
+
+    # Items touching the same columns (and with NULLs in the same pk columns) share one
+    # statement and are sent together as a single executemany
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for item in pending_items:
+        changes = item.get('changes') or {}
+        pk = item.get('pk') or {}
+        original = item.get('original')
+        if original:
+            # drop columns that were edited back to their loaded value
+            changes = {col: val for col, val in changes.items()
+                       if col not in original or _display_str(original[col]) != _display_str(val)}
+        if not changes or not pk:
+            continue
+        params = dict(zip(_param_names("v", len(changes)), changes.values()))
+        pk_spec = _pk_params(pk, params)
+        groups.setdefault((tuple(changes), pk_spec), []).append(params)
+
+    if atomic:
+        conn_ctx = engine.begin()
+    else:
+        conn_ctx = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    with conn_ctx as conn:
+        # On psycopg2, multi-row batches keyed by non-NULL pks go out as one UPDATE ... FROM
+        # (VALUES ...) statement per page instead of one UPDATE per row
+        use_values = getattr(conn.dialect, "driver", None) == "psycopg2"
+        col_types = None
+        for (change_cols, pk_spec), param_list in groups.items():
+            if use_values and len(param_list) > 1 and not any(is_null for _, is_null in pk_spec):
+                if col_types is None:
+                    col_types = _pg_column_types(conn, table_name)
+                count = _pg_update_from_values(conn, table_name, col_types, change_cols, pk_spec, param_list)
+                if count is not None:
+                    total += count
+                    continue
+            stmt = _build_update_stmt(table_name, change_cols, pk_spec)
+            res = conn.execute(stmt, param_list if len(param_list) > 1 else param_list[0])
             try:
-                total += res.rowcount if res is not None and getattr(res, 'rowcount', None) is not None else 0
+                rowcount = res.rowcount if res is not None and getattr(res, 'rowcount', None) is not None else 0
             except Exception:
-                pass
+                rowcount = 0
+            # some drivers report -1 for executemany; assume each row was updated
+            total += rowcount if rowcount >= 0 else len(param_list)
     return total
 
 
@@ -156,22 +451,11 @@ def delete_row(engine, table_name: str, pk: dict) -> int:
     """Delete a single row identified by pk from table using SQLAlchemy Core. Returns rows deleted."""
     if not pk:
         return 0
-    cols = list(pk.keys())
-    tbl = sa_table(table_name, *[sa_column(c) for c in cols])
-    clauses = []
     params = {}
-    for j, (pcol, pval) in enumerate(pk.items()):
-        pname = f"pk_{j}"
-        if pval is None:
-            clauses.append(sa_column(pcol).is_(None))
-        else:
-            clauses.append(sa_column(pcol) == bindparam(pname))
-            params[pname] = pval
-
-    stmt = sa_delete(tbl).where(and_(*clauses))
+    stmt = _build_delete_stmt(table_name, _pk_params(pk, params))
     with engine.begin() as conn:
         res = conn.execute(stmt, params)
         try:
             return res.rowcount if res is not None and getattr(res, 'rowcount', None) is not None else 0
         except Exception:
-            return 0
\ No newline at end of file
+            return 0
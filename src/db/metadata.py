@@ -7,352 +7,882 @@ meant for including in AI prompts; it is defensive and returns an empty string o
 """
 from typing import Optional
 import logging
+import os
 import time
 import shutil
 import subprocess
 import re
+import functools
+import json
+import io
+import math
+import queue
 import threading
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 import sqlparse
+from sqlalchemy import (
+    CheckConstraint, Column, Computed, ForeignKeyConstraint, Identity, MetaData, PrimaryKeyConstraint,
+    Table, UniqueConstraint, inspect, text,
+)
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import NullType
 from sqlparse.sql import IdentifierList, Identifier, Token
 from sqlparse.tokens import Keyword, DML
 
+from . import schema_cache
+
 logger = logging.getLogger(__name__)
 
-# Simple in-memory cache: engine_id -> (ts_seconds, schema_text)
+# Simple in-memory cache: engine fingerprint -> (ts_seconds, schema_text)
 _CACHE: dict = {}
-_CACHE_TTL = 60  # seconds
+# Long-lived: connection add/remove and DDL run through db.executor call clear_schema_cache(engine)
+_CACHE_TTL = 3600  # seconds
+# Schema text persisted on disk (db.schema_cache) survives restarts; reloading a connection
+# in the UI clears it explicitly
+_DISK_CACHE_TTL = 24 * 3600  # seconds
 _MAX_TABLES = 50
+# Upper bound on the rendered summary so prompts stay bounded even for very wide tables
+_MAX_SUMMARY_CHARS = 32 * 1024
+
+# Prompt fragments restricted to the tables a question mentions: (fingerprint, tables) -> (ts, text)
+_PROMPT_CACHE: dict = {}
+# Table names used to match questions against: fingerprint -> (ts, names)
+_TABLE_NAMES: dict = {}
+# PostgreSQL per-table DDL: (fingerprint, table oid, pg_class xmin) -> (ts, ddl). xmin changes when
+# the pg_class row is rewritten (most ALTER TABLEs); the TTL and clear_schema_cache cover the rest
+_DDL_CACHE: dict = {}
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+
+# Engine -> (created_ts, Inspector.info_cache) so reflection results are shared between calls.
+# Only the cache dict is kept (an Inspector holds its engine strongly, which would pin it here).
+_INSPECTOR_CACHES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+# Engine -> fingerprint, computed once per engine (may need a connection for the server version)
+_FINGERPRINTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+# Weak reference to the ConnectionManager registered by set_active_connection_manager(), so a
+# closed window's manager (and its engines) is not kept alive here
+_ACTIVE_MGR: Optional["weakref.ReferenceType"] = None
+# Manager created by _find_engine itself when the app registered none; nothing else holds it
+_FALLBACK_MGR = None
+
+# Callables notified with the engine (None = everything) whenever clear_schema_cache runs
+_INVALIDATION_HOOKS: list = []
 
 # Timeout for short metadata/inspection operations (seconds)
 _INTROSPECTION_TIMEOUT = 5
+# Concurrent per-table reflections for network databases (SQLite is local and runs serially)
+_REFLECT_WORKERS = 8
+# conn.info key of the callable restarting a connection's SQLite statement deadline
+_RESTART_TIMEOUT_KEY = "metadata_restart_timeout"
 
 
-def _call_with_timeout(func, timeout: int = _INTROSPECTION_TIMEOUT):
-    """Run func() in a background thread and return its result or raise on error/timeout.
+def _apply_timeout(conn, ms: int):
+    """Bound statements on conn to ms milliseconds using the driver/server and return an undo callable.
 
-    This is a best-effort safeguard to prevent slow/unresponsive DB drivers from blocking the
-    UI or background workers indefinitely during introspection. The caller should handle
-    exceptions and treat timeouts as introspection failure.
+    This needs no watchdog thread and actually stops the query on the server:
+      - PostgreSQL: SET LOCAL statement_timeout (ends with the connection's transaction)
+      - MySQL: SET SESSION MAX_EXECUTION_TIME (MariaDB: max_statement_time), restored by the undo
+      - SQLite: a progress handler that interrupts once ms have elapsed; _bounded_call restarts
+        the clock so each introspection call gets the full budget
+    Other dialects are left untouched.
     """
-    result = {"ok": False, "value": None, "error": None}
-
-    def _target():
+    ms = int(ms)
+    name = conn.dialect.name
+    if name == 'postgresql':
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {ms}")
+        return lambda: None
+    if name in ('mysql', 'mariadb'):
+        if getattr(conn.dialect, 'is_mariadb', False):
+            var, value = 'max_statement_time', ms / 1000.0
+        else:
+            var, value = 'MAX_EXECUTION_TIME', ms
+        previous = conn.exec_driver_sql(f"SELECT @@SESSION.{var}").scalar()
+        conn.exec_driver_sql(f"SET SESSION {var} = {value}")
+        return lambda: conn.exec_driver_sql(f"SET SESSION {var} = {previous}")
+    if name == 'sqlite':
+        raw = conn.connection.dbapi_connection
+        deadline = [0.0]
+
+        def _restart():
+            deadline[0] = time.monotonic() + ms / 1000.0
+
+        _restart()
+        # a non-zero return aborts the running statement with "interrupted"
+        raw.set_progress_handler(lambda: int(time.monotonic() > deadline[0]), 10000)
+        conn.info[_RESTART_TIMEOUT_KEY] = _restart
+
+        def _undo():
+            conn.info.pop(_RESTART_TIMEOUT_KEY, None)
+            raw.set_progress_handler(None, 0)
+        return _undo
+    return lambda: None
+
+
+def _bounded_call(conn, fn, *args, **kwargs):
+    """Run one introspection call fn(*args, **kwargs) on conn with its own timeout budget.
+
+    On PostgreSQL the call runs inside a SAVEPOINT, so a query that times out or is denied does
+    not abort the transaction the rest of the describe shares (SET LOCAL survives the rollback
+    to the savepoint). The SQLite deadline set by _apply_timeout is restarted for every call.
+    """
+    restart = conn.info.get(_RESTART_TIMEOUT_KEY)
+    if restart is not None:
+        restart()
+    if conn.dialect.name == 'postgresql':
+        with conn.begin_nested():
+            return fn(*args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+@contextmanager
+def _timed_connection(engine, ms: int = _INTROSPECTION_TIMEOUT * 1000):
+    """Yield a connection whose statements are bounded by _apply_timeout(conn, ms)."""
+    with engine.connect() as conn:
         try:
-            result["value"] = func()
-            result["ok"] = True
+            undo = _apply_timeout(conn, ms)
         except Exception as e:
-            result["error"] = e
-
-    thr = threading.Thread(target=_target, daemon=True)
-    thr.start()
-    thr.join(timeout)
-    if result["ok"]:
-        return result["value"]
-    # If thread finished with error, raise it; otherwise treat as timeout
-    if result["error"]:
-        raise result["error"]
-    raise TimeoutError(f"Operation timed out after {timeout} seconds")
+            logger.debug("Could not apply statement timeout: %s", e)
+            undo = None
+        try:
+            yield conn
+        finally:
+            if undo is not None:
+                try:
+                    undo()
+                except Exception as e:
+                    logger.debug("Could not reset statement timeout: %s", e)
 
 
-def _find_engine() -> Optional[object]:
-    """Try to obtain a SQLAlchemy Engine from the application's ConnectionManager.
+def _map_with_deadline(engine, func, items, timeout: float = _INTROSPECTION_TIMEOUT) -> dict:
+    """Run func(item) for each item on worker threads and return {item: result} for those that finished.
 
-    Strategy:
-      - First scan loaded modules for an existing ConnectionManager instance exposed as 'conn_mgr' to reuse the main app's manager.
-      - If not found, import ConnectionManager and instantiate it; prefer an already-created manager if
-        applications expose one as a module-level variable (not required).
-      - If multiple connections exist, pick the first available engine after attempting
-        to lazily reconstruct engines from saved configs (ConnectionManager.get_connection).
+    Calls are network-bound, so overlapping them cuts wall-clock from the sum of round trips to
+    roughly the slowest batch. A single deadline bounds the whole fan-out: items that fail, or are
+    still running when it expires, are left out (pending ones are dropped, running ones abandoned).
+    Workers are daemon threads so an abandoned call never holds up interpreter exit.
     """
-    try:
-        import sys
-        # Prefer reusing an existing ConnectionManager instance if any module exposes one as 'conn_mgr'
-        for mod in list(sys.modules.values()):
+    items = list(items)
+    if not items:
+        return {}
+    dialect_name = getattr(getattr(engine, 'dialect', None), 'name', '') or ''
+    workers = 1 if dialect_name == 'sqlite' else min(_REFLECT_WORKERS, len(items))
+    pending = queue.SimpleQueue()
+    for item in items:
+        pending.put(item)
+    out = {}
+    remaining = [len(items)]
+    cond = threading.Condition()
+    expired = threading.Event()
+
+    def _worker():
+        while not expired.is_set():
             try:
-                if not mod:
-                    continue
-                if hasattr(mod, 'conn_mgr'):
-                    mgr_candidate = getattr(mod, 'conn_mgr')
-                    # basic duck-typing check
-                    if mgr_candidate and hasattr(mgr_candidate, 'list_connections') and hasattr(mgr_candidate, 'get_connection'):
-                        try:
-                            # Prefer the most recently-created engine (last inserted) so UI switches choose the new engine
-                            if getattr(mgr_candidate, '_engines', None):
-                                try:
-                                    items = list(getattr(mgr_candidate, '_engines').items())
-                                    if items:
-                                        # return the last engine inserted
-                                        return items[-1][1]
-                                except Exception:
-                                    # fallback to original iteration
-                                    for _, eng in getattr(mgr_candidate, '_engines').items():
-                                        return eng
-                            # otherwise try to obtain a connection from its list
-                            names = mgr_candidate.list_connections()
-                            if names:
-                                for n in names:
-                                    try:
-                                        eng = mgr_candidate.get_connection(n)
-                                        return eng
-                                    except Exception:
-                                        continue
-                        except Exception:
-                            # ignore and keep searching
-                            continue
-            except Exception:
-                continue
-    except Exception:
-        # not fatal; proceed to creating a new ConnectionManager
-        pass
+                item = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                value, ok = func(item), True
+            except Exception as e:
+                logger.debug("Reflection of %s failed: %s", item, e)
+                value, ok = None, False
+            with cond:
+                if ok and not expired.is_set():
+                    out[item] = value
+                remaining[0] -= 1
+                cond.notify()
+
+    for _ in range(workers):
+        threading.Thread(target=_worker, name="reflect", daemon=True).start()
+    with cond:
+        cond.wait_for(lambda: remaining[0] == 0, timeout=timeout)
+        expired.set()
+        return dict(out)
+
+
+def _engine_identity(engine) -> str:
+    """Credential-free identity of the database an engine points at (dialect, user, host, db, options).
+
+    In-memory SQLite databases are private to their engine, so those include the engine's id.
+    """
+    url = engine.url
+    identity = url.set(password=None).render_as_string(hide_password=False)
+    if not _is_persistable(engine):
+        identity += f"#{id(engine)}"
+    return identity
+
+
+def _is_persistable(engine) -> bool:
+    """Whether schema text for this engine may be reused by another process (not in-memory SQLite)."""
+    return not (engine.dialect.name == "sqlite" and engine.url.database in (None, "", ":memory:"))
+
+
+def _engine_fingerprint(engine) -> str:
+    """Stable cache key for an engine: its identity plus the server version."""
+    fp = _FINGERPRINTS.get(engine)
+    if fp is None:
+        version = engine.dialect.server_version_info
+        if version is None:
+            # the dialect learns the server version on its first connection; ConnectionManager
+            # engines carry a driver connect timeout, so no watchdog thread is needed
+            with engine.connect():
+                pass
+            version = engine.dialect.server_version_info
+        fp = f"{_engine_identity(engine)}|{'.'.join(str(v) for v in version or ())}"
+        _FINGERPRINTS[engine] = fp
+    return fp
 
-    try:
-        # Import locally to avoid import-time cycles
-        from .connection import ConnectionManager
-    except Exception as e:  # pragma: no cover - defensive
-        logger.debug("ConnectionManager import failed: %s", e)
-        return None
 
-    try:
-        # Create a manager instance (this will load saved configs but not test connections)
-        mgr = ConnectionManager()
-    except Exception as e:  # pragma: no cover - defensive
-        logger.debug("Failed to instantiate ConnectionManager: %s", e)
-        return None
+def _inspector_for(engine, conn=None):
+    """Return an Inspector for engine that shares reflection results with earlier calls.
+
+    When conn is given the Inspector runs its queries on it (e.g. one from _timed_connection).
+    The shared info_cache expires after _CACHE_TTL and is dropped by clear_schema_cache(engine).
+    """
+    now = time.time()
+    entry = _INSPECTOR_CACHES.get(engine)
+    if entry is None or now - entry[0] >= _CACHE_TTL:
+        entry = (now, {})
+        _INSPECTOR_CACHES[engine] = entry
+    inspector = inspect(conn if conn is not None else engine)
+    inspector.info_cache = entry[1]
+    return inspector
+
 
-    # If there are actively created engines, prefer those
+def set_active_connection_manager(mgr) -> None:
+    """Register the ConnectionManager whose engines metadata helpers should introspect.
+
+    ConnectionManager registers itself on construction, so the most recently created manager wins.
+    """
+    global _ACTIVE_MGR
+    _ACTIVE_MGR = weakref.ref(mgr) if mgr is not None else None
+
+
+def get_active_connection_manager():
+    """Return the registered ConnectionManager, or None if none is registered or it was discarded."""
+    ref = _ACTIVE_MGR
+    return ref() if ref is not None else None
+
+
+def _engine_from_manager(mgr) -> Optional[object]:
+    """Pick an engine from mgr: the most recently created one, else the first saved config that builds."""
+    # Prefer the most recently-created engine (last inserted) so UI switches choose the new engine
     try:
-        if mgr._engines:
-            # Prefer the most recently-created engine (last inserted) so UI switches choose the new engine
-            try:
-                items = list(mgr._engines.items())
-                if items:
-                    # return the last engine inserted
-                    return items[-1][1]
-            except Exception:
-                # fallback to original iteration
-                for name, eng in mgr._engines.items():
-                    return eng
+        items = list(mgr._engines.items())
+        if items:
+            return items[-1][1]
     except Exception:
         pass
 
     # Otherwise try to reconstruct an engine from saved configs by calling get_connection
     try:
         names = mgr.list_connections()
-        if not names:
-            return None
-        # Pick first name and attempt to construct engine
-        first = names[0]
-        try:
-            engine = mgr.get_connection(first)
-            return engine
-        except Exception:
-            # try other names
-            for n in names[1:]:
-                try:
-                    engine = mgr.get_connection(n)
-                    return engine
-                except Exception:
-                    continue
     except Exception:
-        logger.debug("Failed to list or get a connection from ConnectionManager")
+        logger.debug("Failed to list connections from ConnectionManager")
         return None
-
+    for n in names or []:
+        try:
+            return mgr.get_connection(n)
+        except Exception:
+            continue
     return None
 
 
-def _format_column(col: dict) -> str:
-    """Return a single-line description for a column inspector dict."""
-    name = col.get("name")
-    typ = str(col.get("type"))
-    nullable = col.get("nullable")
-    default = col.get("default")
-    return f"  - {name}: {typ}, nullable={nullable}, default={default}"
+def _find_engine() -> Optional[object]:
+    """Try to obtain a SQLAlchemy Engine from the application's ConnectionManager.
 
+    Strategy:
+      - Use the registered manager (see set_active_connection_manager); the main window's manager
+        registers itself when it is created.
+      - If none is registered, import ConnectionManager and instantiate it (it then registers itself,
+        so later calls reuse it).
+      - If multiple connections exist, pick the most recently created engine, else the first saved
+        config that can be reconstructed (ConnectionManager.get_connection).
+    """
+    global _FALLBACK_MGR
+    mgr = get_active_connection_manager()
+    if mgr is None:
+        try:
+            # Import locally to avoid import-time cycles
+            from .connection import ConnectionManager
+        except Exception as e:  # pragma: no cover - defensive
+            logger.debug("ConnectionManager import failed: %s", e)
+            return None
 
-def get_current_db_schema() -> str:
-    """Return a human-readable summary of the current connected DB schema.
+        try:
+            # Create a manager instance (this will load saved configs but not test connections);
+            # it registers itself, and _FALLBACK_MGR keeps it alive for later lookups
+            mgr = _FALLBACK_MGR = ConnectionManager()
+        except Exception as e:  # pragma: no cover - defensive
+            logger.debug("Failed to instantiate ConnectionManager: %s", e)
+            return None
 
-    Uses a short in-memory cache to avoid expensive repeated introspection. Introspects
-    at most _MAX_TABLES tables to keep prompts bounded.
-    """
-    try:
-        engine = _find_engine()
-        if engine is None:
-            return ""
+    return _engine_from_manager(mgr)
+
+
+_COLUMN_LINE = "  - {name}: {type}, nullable={nullable}, default={default}\n"
 
-        # cache key based on engine identity (best-effort)
+# Reflected type object -> its SQL text. Inspector results are shared per engine (see _inspector_for),
+# so the same type objects come back on every summary until the cache is cleared.
+_TYPE_STR_CACHE: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _stringify_type(type_, dialect=None) -> str:
+    """Render a column type as the target dialect would spell it, memoized per type object."""
+    try:
+        cached = _TYPE_STR_CACHE.get(type_)
+    except TypeError:
+        # not weak-referenceable (e.g. None)
+        return str(type_)
+    if cached is None:
         try:
-            key = f"engine:{id(engine)}"
-            entry = _CACHE.get(key)
-            if entry:
-                ts, cached = entry
-                if time.time() - ts < _CACHE_TTL:
-                    return cached
+            cached = type_.compile(dialect=dialect)
         except Exception:
-            key = None
+            cached = str(type_)
+        _TYPE_STR_CACHE[type_] = cached
+    return cached
+
+
+def _format_column(col: dict, dialect=None) -> str:
+    """Return a single-line description (with trailing newline) for a column inspector dict."""
+    return _COLUMN_LINE.format(
+        name=col.get("name"), type=_stringify_type(col.get("type"), dialect),
+        nullable=col.get("nullable"), default=col.get("default"))
+
+
+def _safe(fn, *args, default=None, **kwargs):
+    """Return fn(*args, **kwargs), or default if it raises or returns None."""
+    try:
+        result = fn(*args, **kwargs)
+    except Exception:
+        return default
+    return default if result is None else result
 
-        from sqlalchemy import inspect, MetaData, Table
-        from sqlalchemy.schema import CreateTable
 
-        inspector = inspect(engine)
-        out_lines = []
+def _reflect_tables(inspector, kind: str, tables, conn=None) -> dict:
+    """Return {table_name: result} for one Inspector reflection kind ("columns", "indexes", ...).
 
+    Uses the batched get_multi_<kind>() API (SQLAlchemy 2.0+), which most dialects answer with a
+    single catalog query for the whole schema. Falls back to get_<kind>(table) per table on older
+    SQLAlchemy or if the batched call fails; tables that cannot be introspected are left out.
+    When conn (the inspector's connection) is given, every call goes through _bounded_call.
+    """
+    def _call(fn, *args, **kwargs):
+        if conn is None:
+            return fn(*args, **kwargs)
+        return _bounded_call(conn, fn, *args, **kwargs)
+
+    names = list(tables)
+    multi = getattr(inspector, f"get_multi_{kind}", None)
+    if multi is not None:
         try:
-            try:
-                tables = _call_with_timeout(lambda: inspector.get_table_names()) or []
-            except Exception:
-                tables = []
+            by_key = _call(multi, filter_names=names) or {}
+            return {name: value for (_schema, name), value in by_key.items()}
+        except Exception as e:
+            logger.debug("Batched %s reflection failed, falling back per table: %s", kind, e)
+    single = getattr(inspector, f"get_{kind}")
+    out = {}
+    for t in names:
+        try:
+            out[t] = _call(single, t)
+        except NotImplementedError:
+            # the dialect does not support this kind; nothing to fetch again later
+            out[t] = None
         except Exception:
-            tables = []
+            pass
+    return out
+
+
+def _compile_ddl(tbl, dialect) -> str:
+    """Compile CREATE TABLE for tbl, retrying with literal binds for defaults that need them."""
+    try:
+        return str(CreateTable(tbl).compile(dialect=dialect))
+    except Exception:
+        return str(CreateTable(tbl).compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _column_from_dict(col: dict):
+    """Build a Column from an Inspector.get_columns() entry, mirroring what reflection would create."""
+    args = []
+    if col.get("computed"):
+        computed = col["computed"]
+        args.append(Computed(computed["sqltext"], persisted=computed.get("persisted")))
+    if col.get("identity"):
+        args.append(Identity(**col["identity"]))
+    kwargs = {"nullable": col.get("nullable", True)}
+    if col.get("default") is not None and not col.get("computed"):
+        kwargs["server_default"] = text(col["default"])
+    if "autoincrement" in col:
+        kwargs["autoincrement"] = col["autoincrement"]
+    if col.get("comment"):
+        kwargs["comment"] = col["comment"]
+    return Column(col["name"], col["type"], *args, **kwargs)
+
+
+def _ddl_from_inspector_dicts(tables, cols_by_tbl, pk_by_tbl, fks_by_tbl, uniques_by_tbl, checks_by_tbl, dialect) -> dict:
+    """Return {table_name: CREATE TABLE text} synthesized from already-fetched inspector dicts.
+
+    Builds in-memory Tables (no autoload_with, so no server round trips) and compiles them.
+    Tables referenced by foreign keys but not in tables get name-only stubs. Tables whose
+    definition cannot be rebuilt are left out.
+    """
+    meta = MetaData()
+    built = {}
+    for t in tables:
+        cols = cols_by_tbl.get(t)
+        if not cols:
+            continue
         try:
+            items = [_column_from_dict(c) for c in cols]
+            pk = pk_by_tbl.get(t)
+            if isinstance(pk, dict) and pk.get("constrained_columns"):
+                items.append(PrimaryKeyConstraint(*pk["constrained_columns"], name=pk.get("name")))
+            for uc in uniques_by_tbl.get(t) or []:
+                items.append(UniqueConstraint(*uc["column_names"], name=uc.get("name")))
+            for cc in checks_by_tbl.get(t) or []:
+                items.append(CheckConstraint(text(cc["sqltext"]), name=cc.get("name")))
+            built[t] = Table(t, meta, *items)
+        except Exception as e:
+            logger.debug("Could not rebuild table %s from inspector data: %s", t, e)
+
+    # Foreign keys once every table exists, so references between summarized tables resolve
+    for t, tbl in built.items():
+        for fk in fks_by_tbl.get(t) or []:
             try:
-                views = _call_with_timeout(lambda: inspector.get_view_names()) or []
-            except Exception:
-                views = []
-        except Exception:
-            views = []
+                ref_schema = fk.get("referred_schema")
+                ref_name = fk["referred_table"]
+                ref = meta.tables.get(f"{ref_schema}.{ref_name}" if ref_schema else ref_name)
+                if ref is None:
+                    ref = Table(ref_name, meta, schema=ref_schema)
+                for rc in fk["referred_columns"]:
+                    if rc not in ref.c:
+                        ref.append_column(Column(rc, NullType()))
+                tbl.append_constraint(ForeignKeyConstraint(
+                    fk["constrained_columns"], [ref.c[rc] for rc in fk["referred_columns"]],
+                    name=fk.get("name"), **(fk.get("options") or {})))
+            except Exception as e:
+                logger.debug("Could not rebuild foreign key on %s: %s", t, e)
+
+    out = {}
+    for t, tbl in built.items():
+        try:
+            out[t] = _compile_ddl(tbl, dialect)
+        except Exception as e:
+            logger.debug("Could not compile DDL for %s: %s", t, e)
+    return out
 
-        if not tables and not views:
-            return ""
 
-        out_lines.append(f"Connection dialect: {getattr(engine, 'dialect', None)}")
-        if tables:
-            truncated_tables = False
-            tables_sorted = sorted(tables)
-            if len(tables_sorted) > _MAX_TABLES:
-                tables_sorted = tables_sorted[:_MAX_TABLES]
-                truncated_tables = True
-
-            out_lines.append("Tables:")
-            for t in tables_sorted:
-                out_lines.append(f"- {t}")
-                # columns
-                try:
-                    try:
-                        cols = _call_with_timeout(lambda: inspector.get_columns(t)) or []
-                    except Exception:
-                        cols = []
-                    for c in cols:
-                        out_lines.append(_format_column(c))
-                except Exception:
-                    out_lines.append("  (failed to introspect columns)")
+def _compile_create_tables(engine, conn, tables) -> dict:
+    """Return {table_name: CREATE TABLE text} compiled from a single MetaData.reflect() pass on conn.
 
-                # primary key
-                try:
-                    try:
-                        pk = _call_with_timeout(lambda: inspector.get_pk_constraint(t))
-                    except Exception:
-                        pk = None
-                    pk_cols = pk.get("constrained_columns") if isinstance(pk, dict) else None
-                    out_lines.append(f"  Primary key: {pk_cols}")
-                except Exception:
-                    pass
+    Falls back to reflecting tables one at a time if the batched reflection fails (e.g. one table
+    uses a type the dialect cannot reflect); tables that still fail are left out.
+    """
+    def _compile(tbl):
+        return _compile_ddl(tbl, engine.dialect)
 
-                # foreign keys
+    names = list(tables)
+    out = {}
+    try:
+        meta = MetaData()
+        _bounded_call(conn, meta.reflect, bind=conn, only=names)
+        for t in names:
+            tbl = meta.tables.get(t)
+            if tbl is not None:
                 try:
-                    try:
-                        fks = _call_with_timeout(lambda: inspector.get_foreign_keys(t)) or []
-                    except Exception:
-                        fks = []
-                    if fks:
-                        for fk in fks:
-                            out_lines.append(f"  FK: columns={fk.get('constrained_columns')} -> {fk.get('referred_table')}.{fk.get('referred_columns')}")
+                    out[t] = _compile(tbl)
                 except Exception:
                     pass
+        return out
+    except Exception as e:
+        logger.debug("Batched table reflection failed, falling back per table: %s", e)
 
-                # indexes
-                try:
-                    try:
-                        idxs = _call_with_timeout(lambda: inspector.get_indexes(t)) or []
-                    except Exception:
-                        idxs = []
-                    if idxs:
-                        for idx in idxs:
-                            out_lines.append(f"  Index: {idx.get('name')} columns={idx.get('column_names')} unique={idx.get('unique')}")
-                except Exception:
-                    pass
+    # Each worker reflects on its own connection (a failed statement may have ended conn's
+    # transaction); the fan-out deadline bounds the whole pass
+    def _reflect_one(t):
+        with _timed_connection(engine) as worker_conn:
+            return _compile(Table(t, MetaData(), autoload_with=worker_conn))
 
-                # attempt to generate CREATE TABLE via SQLAlchemy reflection
-                try:
-                    # Reflection and compilation may block; run with timeout
-                    def _reflect_and_compile():
-                        meta = MetaData()
-                        tbl = Table(t, meta, autoload_with=engine)
-                        try:
-                            return str(CreateTable(tbl).compile(dialect=engine.dialect))
-                        except Exception:
-                            return str(CreateTable(tbl).compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
-
-                    try:
-                        create_sql = _call_with_timeout(_reflect_and_compile)
-                        if create_sql:
-                            out_lines.append("  CREATE: ")
-                            for line in create_sql.splitlines():
-                                out_lines.append("    " + line)
-                    except Exception:
-                        # reflection/compile failed or timed out; skip
-                        pass
-                except Exception:
-                    # If reflection fails unexpectedly, skip create stmt
-                    pass
+    return _map_with_deadline(engine, _reflect_one, names)
 
-            if truncated_tables:
-                out_lines.append(f"... (table list truncated to first {_MAX_TABLES} tables) ")
 
-        if views:
-            out_lines.append("Views:")
-            for v in sorted(views):
-                out_lines.append(f"- {v}")
-                try:
-                    # For views, try to get view definition if supported
-                    try:
-                        defn = _call_with_timeout(lambda: inspector.get_view_definition(v))
-                        out_lines.append("  Definition:")
-                        for line in (defn or "").splitlines():
-                            out_lines.append("    " + line)
-                    except Exception:
-                        out_lines.append("  (view definition not available)")
-                except Exception:
-                    pass
+_DETAIL_KINDS = ("columns", "pk_constraint", "foreign_keys", "indexes", "unique_constraints", "check_constraints")
+
+
+@dataclass
+class SchemaDescription:
+    """Table/view names of one engine's schema plus per-table inspector data, filled in on demand.
+
+    Each details dict maps table name -> the matching Inspector result ("columns" -> get_columns(),
+    "pk_constraint" -> get_pk_constraint(), ...). Tables are only present once they were requested
+    through describe(engine, tables=...).
+    """
+    dialect_name: str
+    tables: list
+    views: list
+    ts: float
+    details: dict = field(default_factory=lambda: {kind: {} for kind in _DETAIL_KINDS})
+    # tables whose details were fetched (even if some kinds came back empty)
+    detailed: set = field(default_factory=set)
+
+    @property
+    def columns(self) -> dict:
+        return self.details["columns"]
+
+
+# Engine -> SchemaDescription; shared by the AI summary, CREATE export and autocomplete
+_DESCRIPTIONS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
 
-        result_text = "\n".join(out_lines)
-        # store in cache
+def describe(engine, tables=(), conn=None) -> SchemaDescription:
+    """Return the cached SchemaDescription for engine, making sure details for tables are loaded.
+
+    The table/view lists are fetched once per _CACHE_TTL (or until clear_schema_cache(engine)); details
+    for tables not seen before are fetched with one batched inspector call per kind. conn, if given,
+    is used for the queries (it should come from _timed_connection); otherwise one is opened.
+    """
+    desc = _DESCRIPTIONS.get(engine)
+    if desc is not None and time.time() - desc.ts >= _CACHE_TTL:
+        desc = None
+    known = set(desc.tables) if desc is not None else set()
+    missing = [t for t in tables if t not in desc.detailed and t in known] if desc is not None else list(tables)
+    if desc is not None and not missing:
+        return desc
+
+    if conn is None:
+        with _timed_connection(engine) as own_conn:
+            return describe(engine, tables, own_conn)
+
+    inspector = _inspector_for(engine, conn)
+    if desc is None:
         try:
-            if key is not None:
-                _CACHE[key] = (time.time(), result_text)
-        except Exception:
-            pass
+            table_names = sorted(_bounded_call(conn, inspector.get_table_names) or [])
+        except Exception as e:
+            # an empty list must not be cached for the whole TTL
+            logger.debug("Could not list tables: %s", e)
+            return SchemaDescription(engine.dialect.name, [], [], time.time())
+        view_names = sorted(_safe(_bounded_call, conn, inspector.get_view_names, default=[]))
+        desc = SchemaDescription(engine.dialect.name, table_names, view_names, time.time())
+        _DESCRIPTIONS[engine] = desc
+        known = set(table_names)
+        missing = [t for t in tables if t in known]
+    if missing:
+        fetched = {kind: _reflect_tables(inspector, kind, missing, conn) for kind in _DETAIL_KINDS}
+        for kind, by_table in fetched.items():
+            desc.details[kind].update(by_table)
+        # tables with a failed kind are fetched again on the next request
+        desc.detailed.update(t for t in missing if all(t in by_table for by_table in fetched.values()))
+    return desc
+
+
+def _build_schema_summary(engine, conn, only: Optional[tuple] = None) -> str:
+    """Introspect the database behind conn and render the summary text ("" if it has no tables/views).
+
+    conn should come from _timed_connection so every catalog query is bounded by the server/driver.
+    If only is given, the summary is restricted to those table/view names. Whole tables/views are
+    dropped once the text exceeds _MAX_SUMMARY_CHARS.
+    """
+    buf = io.StringIO()
+    write = buf.write
+
+    desc = describe(engine, conn=conn)
+    tables = desc.tables
+    views = desc.views
+    if only is not None:
+        wanted = set(only)
+        tables = [t for t in tables if t in wanted]
+        views = [v for v in views if v in wanted]
+
+    if not tables and not views:
+        return ""
+
+    write(f"Connection dialect: {getattr(engine, 'dialect', None)}\n")
+    truncated = False
+    if tables:
+        truncated_tables = False
+        tables_sorted = tables
+        if len(tables_sorted) > _MAX_TABLES:
+            tables_sorted = tables_sorted[:_MAX_TABLES]
+            truncated_tables = True
+
+        write("Tables:\n")
+        # One batched call per kind (only for tables not described yet) instead of per-table round trips
+        details = describe(engine, tables_sorted, conn).details
+        cols_by_tbl = details["columns"]
+        pk_by_tbl = details["pk_constraint"]
+        fks_by_tbl = details["foreign_keys"]
+        idxs_by_tbl = details["indexes"]
+        uniques_by_tbl = details["unique_constraints"]
+        checks_by_tbl = details["check_constraints"]
+        # CREATE TABLE text from the dicts above; reflect only tables that could not be rebuilt
+        create_by_tbl = _ddl_from_inspector_dicts(
+            tables_sorted, cols_by_tbl, pk_by_tbl, fks_by_tbl, uniques_by_tbl, checks_by_tbl, engine.dialect)
+        missing = [t for t in tables_sorted if t not in create_by_tbl]
+        if missing:
+            create_by_tbl.update(_compile_create_tables(engine, conn, missing))
+        for t in tables_sorted:
+            if buf.tell() > _MAX_SUMMARY_CHARS:
+                truncated = True
+                break
+            write(f"- {t}\n")
+            # columns
+            try:
+                for c in cols_by_tbl.get(t) or []:
+                    write(_format_column(c, engine.dialect))
+            except Exception:
+                write("  (failed to introspect columns)\n")
+
+            # primary key
+            pk = pk_by_tbl.get(t)
+            pk_cols = pk.get("constrained_columns") if isinstance(pk, dict) else None
+            write(f"  Primary key: {pk_cols}\n")
+
+            # foreign keys
+            for fk in fks_by_tbl.get(t) or []:
+                write(f"  FK: columns={fk.get('constrained_columns')} -> {fk.get('referred_table')}.{fk.get('referred_columns')}\n")
+
+            # indexes
+            for idx in idxs_by_tbl.get(t) or []:
+                write(f"  Index: {idx.get('name')} columns={idx.get('column_names')} unique={idx.get('unique')}\n")
+
+            # CREATE TABLE generated via SQLAlchemy reflection
+            create_sql = create_by_tbl.get(t)
+            if create_sql:
+                write("  CREATE: \n")
+                for line in create_sql.splitlines():
+                    write("    ")
+                    write(line)
+                    write("\n")
+
+        if truncated_tables and not truncated:
+            write(f"... (table list truncated to first {_MAX_TABLES} tables) \n")
+
+    if views and not truncated:
+        write("Views:\n")
+        for v in sorted(views):
+            if buf.tell() > _MAX_SUMMARY_CHARS:
+                truncated = True
+                break
+            write(f"- {v}\n")
+            # For views, try to get view definition if supported
+            try:
+                defn = _bounded_call(conn, _inspector_for(engine, conn).get_view_definition, v)
+                write("  Definition:\n")
+                for line in (defn or "").splitlines():
+                    write("    ")
+                    write(line)
+                    write("\n")
+            except Exception:
+                write("  (view definition not available)\n")
+
+    if truncated:
+        write(f"... (truncated at {_MAX_SUMMARY_CHARS} characters)\n")
+    # no trailing newline, matching the previous "\n".join() output
+    return buf.getvalue()[:-1]
+
+
+def get_current_db_schema() -> str:
+    """Return a human-readable summary of the current connected DB schema.
+
+    Uses a short in-memory cache to avoid expensive repeated introspection. Introspects
+    at most _MAX_TABLES tables to keep prompts bounded.
+    """
+    return get_schema_for_prompt()
+
+
+def get_schema_for_prompt(engine: Optional[object] = None, tables: Optional[tuple] = None) -> str:
+    """Return the schema summary for an AI prompt, optionally restricted to the given tables.
+
+    The full summary is cached in memory and on disk (see get_current_db_schema). Restricted
+    fragments are cached in memory per (engine fingerprint, sorted tables), so repeated questions
+    about the same tables skip both introspection and rendering. If none of the tables exist the
+    full summary is returned. engine defaults to the application's current connection.
+    """
+    try:
+        if engine is None:
+            engine = _find_engine()
+        if engine is None:
+            return ""
+        if not tables:
+            return _full_schema_summary(engine)
 
+        only = tuple(sorted(set(tables)))
+        try:
+            key = (_engine_fingerprint(engine), only)
+        except Exception:
+            key = None
+        entry = _PROMPT_CACHE.get(key) if key is not None else None
+        if entry and time.time() - entry[0] < _CACHE_TTL:
+            return entry[1]
+
+        with _timed_connection(engine) as conn:
+            result_text = _build_schema_summary(engine, conn, only)
+        if not result_text:
+            return _full_schema_summary(engine)
+        if key is not None:
+            _PROMPT_CACHE[key] = (time.time(), result_text)
         return result_text
     except Exception as e:  # pragma: no cover - highest-level safety
-        logger.debug("get_current_db_schema failed: %s", e, exc_info=True)
+        logger.debug("get_schema_for_prompt failed: %s", e, exc_info=True)
         return ""
 
 
+def _full_schema_summary(engine) -> str:
+    """Summary of the whole schema, served from the memory/disk caches when fresh."""
+    # cache key based on the engine fingerprint (best-effort); memory first, then disk
+    try:
+        key = _engine_fingerprint(engine)
+        entry = _CACHE.get(key)
+        if entry:
+            ts, cached = entry
+            if time.time() - ts < _CACHE_TTL:
+                return cached
+        if _is_persistable(engine):
+            cached = schema_cache.get(key, _DISK_CACHE_TTL)
+            if cached is not None:
+                _CACHE[key] = (time.time(), cached)
+                return cached
+    except Exception:
+        key = None
+
+    with _timed_connection(engine) as conn:
+        result_text = _build_schema_summary(engine, conn)
+    if not result_text:
+        return ""
+
+    # store in cache
+    try:
+        if key is not None:
+            _CACHE[key] = (time.time(), result_text)
+            if _is_persistable(engine):
+                schema_cache.put(key, result_text)
+    except Exception:
+        pass
+
+    return result_text
+
+
+def tables_mentioned_in(question: str, engine: Optional[object] = None) -> tuple:
+    """Best-effort guess of the tables a natural-language question (or pasted SELECT) refers to.
+
+    Words are matched case-insensitively against the table names, allowing a simple plural/singular
+    difference ("orders" matches table order, "user" matches table users). Returns a sorted tuple,
+    empty when nothing matches or the table list is unavailable.
+    """
+    try:
+        if not question:
+            return ()
+        if engine is None:
+            engine = _find_engine()
+        if engine is None:
+            return ()
+        fp = _engine_fingerprint(engine)
+        entry = _TABLE_NAMES.get(fp)
+        if entry and time.time() - entry[0] < _CACHE_TTL:
+            names = entry[1]
+        else:
+            with _timed_connection(engine) as conn:
+                inspector = _inspector_for(engine, conn)
+                names = tuple(inspector.get_table_names() or ()) + tuple(inspector.get_view_names() or ())
+            _TABLE_NAMES[fp] = (time.time(), names)
+
+        lookup = {n.lower(): n for n in names}
+        found = set()
+        first = extract_first_table_from_select(question)
+        if first:
+            base = first.split('.')[-1].lower()
+            if base in lookup:
+                found.add(lookup[base])
+        for word in _WORD_RE.findall(question):
+            w = word.lower()
+            for cand in (w, w + 's', w[:-1] if w.endswith('s') else None, w[:-2] if w.endswith('es') else None):
+                if cand and cand in lookup:
+                    found.add(lookup[cand])
+                    break
+        return tuple(sorted(found))
+    except Exception as e:
+        logger.debug("tables_mentioned_in failed: %s", e)
+        return ()
+
+
+def register_invalidation_hook(callback) -> None:
+    """Call callback(engine) after every clear_schema_cache(engine); engine is None when all caches are cleared.
+
+    Lets other caches of schema-derived data (e.g. UI completions) follow the same invalidation events.
+    """
+    if callback not in _INVALIDATION_HOOKS:
+        _INVALIDATION_HOOKS.append(callback)
+
+
 def clear_schema_cache(engine: Optional[object] = None) -> None:
     """Invalidate cached schema entries.
 
-    If engine is None, clear the entire cache. Otherwise clear entries associated with the given engine
-    identity (best-effort by id(engine)). This is useful when the UI changes the session-level schema
-    (e.g., SET search_path) or when a connection is added/removed/edited.
+    If engine is None, clear the entire cache (in memory and on disk). Otherwise clear entries for the
+    database the engine points at, whatever server version they were recorded with. This is useful when
+    the UI changes the session-level schema (e.g., SET search_path) or when a connection is
+    added/removed/edited.
     """
     try:
         if engine is None:
             _CACHE.clear()
+            _PROMPT_CACHE.clear()
+            _TABLE_NAMES.clear()
+            _DDL_CACHE.clear()
+            _DESCRIPTIONS.clear()
+            _INSPECTOR_CACHES.clear()
+            schema_cache.delete_prefix("")
             return
-        key = f"engine:{id(engine)}"
-        if key in _CACHE:
-            try:
-                del _CACHE[key]
-            except Exception:
-                pass
+        _INSPECTOR_CACHES.pop(engine, None)
+        _DESCRIPTIONS.pop(engine, None)
+        prefix = _engine_identity(engine) + "|"
+        for key in [k for k in _CACHE if k.startswith(prefix)]:
+            _CACHE.pop(key, None)
+        for key in [k for k in _TABLE_NAMES if k.startswith(prefix)]:
+            _TABLE_NAMES.pop(key, None)
+        for key in [k for k in _PROMPT_CACHE if k[0].startswith(prefix)]:
+            _PROMPT_CACHE.pop(key, None)
+        for key in [k for k in _DDL_CACHE if k[0].startswith(prefix)]:
+            _DDL_CACHE.pop(key, None)
+        if _is_persistable(engine):
+            schema_cache.delete_prefix(prefix)
     except Exception:
         # best-effort; swallow errors
         pass
+    for callback in list(_INVALIDATION_HOOKS):
+        try:
+            callback(engine)
+        except Exception as e:
+            logger.debug("Schema invalidation hook failed: %s", e)
+
+
+_PGDUMP_TIMEOUT = 20  # seconds
+_PGDUMP_POLL_INTERVAL = 0.1  # seconds between cancel/timeout checks
+
+
+def _drain_pipe(pipe, sink) -> None:
+    """Read pipe until EOF, handing each chunk to sink (runs on a helper thread)."""
+    try:
+        for chunk in iter(lambda: pipe.read(8192), ''):
+            sink(chunk)
+    except Exception:
+        pass
+    finally:
+        try:
+            pipe.close()
+        except Exception:
+            pass
+
 
+def _run_pgdump(engine, table_name: str | None = None, cancel_event: Optional[threading.Event] = None,
+                on_chunk=None, timeout: float = _PGDUMP_TIMEOUT) -> str:
+    """Run pg_dump if available to extract schema. Returns stdout or empty string on failure.
 
-def _run_pgdump(engine, table_name: str | None = None) -> str:
-    """Run pg_dump if available to extract schema. Returns stdout or empty string on failure."""
+    Output is read incrementally on helper threads (select() does not work on pipes on Windows), so
+    the calling thread only waits in short slices: setting cancel_event or exceeding timeout
+    terminates pg_dump. on_chunk(text) is called with each piece of output as it arrives.
+    """
     try:
         pgdump = shutil.which("pg_dump")
         if not pgdump:
@@ -360,39 +890,187 @@ def _run_pgdump(engine, table_name: str | None = None) -> str:
         cmd = [pgdump, "--schema-only", "--no-owner", "--no-privileges"]
         if table_name:
             cmd += ["--table", table_name]
-        # SQLAlchemy engine.url is a URL object but str(...) yields a libpq-style URL acceptable to pg_dump
-        db_url = str(getattr(engine, 'url', engine))
-        cmd.append(db_url)
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=20)
-        if proc.returncode == 0:
-            return proc.stdout
-        return ""
+        # pg_dump wants a libpq URL: no SQLAlchemy driver suffix, and the password goes through
+        # the environment rather than the command line (str(url) would mask it anyway)
+        url = getattr(engine, 'url', None)
+        env = None
+        if url is not None:
+            cmd.append(url.set(drivername='postgresql', password=None).render_as_string(hide_password=False))
+            if url.password:
+                env = {**os.environ, "PGPASSWORD": str(url.password)}
+        else:
+            cmd.append(str(engine))
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
     except Exception:
         return ""
 
+    chunks = []
+    errors = []
+
+    def _on_stdout(chunk):
+        chunks.append(chunk)
+        if on_chunk is not None:
+            try:
+                on_chunk(chunk)
+            except Exception:
+                pass
+
+    readers = [threading.Thread(target=_drain_pipe, args=(proc.stdout, _on_stdout), daemon=True),
+               threading.Thread(target=_drain_pipe, args=(proc.stderr, errors.append), daemon=True)]
+    for thr in readers:
+        thr.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                proc.wait(timeout=_PGDUMP_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if cancel_event is not None and cancel_event.is_set():
+                logger.debug("pg_dump canceled")
+                return ""
+            if time.monotonic() > deadline:
+                logger.debug("pg_dump timed out after %s seconds", timeout)
+                return ""
+        for thr in readers:
+            thr.join(_PGDUMP_POLL_INTERVAL * 10)
+        if proc.returncode == 0:
+            return "".join(chunks)
+        logger.debug("pg_dump failed (%s): %s", proc.returncode, "".join(errors)[:500])
+        return ""
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=2)
+            except Exception:
+                proc.kill()
+
+
+# CREATE TABLE blocks in pg_dump output; pg_dump ends each one with ")" + ";" alone on a line
+_PGDUMP_IDENT = r'(?:"(?:[^"]|"")*"|[^\s(."]+)'
+_PGDUMP_CREATE_RE = re.compile(
+    rf'^CREATE (?:UNLOGGED )?TABLE (?:IF NOT EXISTS )?({_PGDUMP_IDENT}(?:\.{_PGDUMP_IDENT})?)\s*\(.*?\n\);',
+    re.MULTILINE | re.DOTALL)
+_PGDUMP_IDENT_RE = re.compile(_PGDUMP_IDENT)
+
+
+def _pgdump_name_parts(name: str) -> list:
+    """Split a possibly quoted, possibly schema-qualified name into its unquoted parts."""
+    return [p[1:-1].replace('""', '"') if p.startswith('"') else p
+            for p in _PGDUMP_IDENT_RE.findall(name)]
+
+
+@functools.lru_cache(maxsize=4)
+def _index_pgdump(pgdump_text: str) -> dict:
+    """Map table names to their CREATE TABLE statements in one pass over pg_dump output.
+
+    Each table is stored under its unquoted name and its unquoted "schema.table" name; the
+    first occurrence wins. Memoized so repeated lookups against the same dump do not rescan it.
+    """
+    index = {}
+    for m in _PGDUMP_CREATE_RE.finditer(pgdump_text):
+        parts = _pgdump_name_parts(m.group(1))
+        index.setdefault(parts[-1], m.group(0))
+        index.setdefault('.'.join(parts), m.group(0))
+    return index
+
 
 def _extract_first_create_table_from_pgdump(pgdump_text: str, table_name: str) -> str:
-    """Attempt to extract the CREATE TABLE statement for table_name from a pg_dump output.
+    """Return the CREATE TABLE statement for table_name (bare or schema-qualified) from pg_dump output.
 
-    This is best-effort: looks for the CREATE TABLE block for the given table and returns it.
+    Best-effort: returns an empty string if the table has no CREATE TABLE block in the dump.
     """
     try:
-        # Normalize whitespace
-        txt = pgdump_text
-        # Use regex to find CREATE TABLE ... ; blocks referencing the table name
-        # Match CREATE TABLE [IF NOT EXISTS] <schema>."?table"? ... ; (non-greedy)
-        pattern = re.compile(rf"CREATE TABLE[\s\S]*?\b{re.escape(table_name)}\b[\s\S]*?;", re.IGNORECASE)
-        m = pattern.search(txt)
-        if m:
-            return m.group(0)
+        index = _index_pgdump(pgdump_text)
+        if table_name in index:
+            return index[table_name]
+        return index.get('.'.join(_pgdump_name_parts(table_name)), "")
     except Exception:
-        pass
-    return ""
+        return ""
 
 
 def _quote_ident(name: str) -> str:
     """Return a safely quoted identifier for PostgreSQL."""
-    return f'"{name.replace("\"", "\"\"")}"'
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _pg_format_create_table(schema: str, relname: str, cols, con_defs, index_defs) -> str:
+    """Render CREATE TABLE DDL from pg_catalog rows.
+
+    cols are (name, formatted type, not null, default expression, attidentity) sequences, con_defs
+    pg_get_constraintdef() strings and index_defs pg_indexes.indexdef strings. Returns "" if the
+    table has neither columns nor constraints.
+    """
+    # Build column definitions
+    col_lines = []
+    for r in cols:
+        col_name, col_type, not_null, default_val, identity = r[0], r[1], r[2], r[3], r[4]
+        line = f"{_quote_ident(col_name)} {col_type}"
+        # Identity columns; attidentity is one of '', 'a' (always), 'd' (by default)
+        if identity:
+            if identity == 'a':
+                line += ' GENERATED ALWAYS AS IDENTITY'
+            else:
+                line += ' GENERATED BY DEFAULT AS IDENTITY'
+        # Default expression (e.g., nextval('seq'::regclass))
+        if default_val is not None:
+            line += f" DEFAULT {default_val}"
+        # Not null
+        if not_null:
+            line += ' NOT NULL'
+        col_lines.append(line)
+
+    # Table constraints from pg_get_constraintdef (strings like 'PRIMARY KEY (col)')
+    table_cons = [con_def for con_def in con_defs if con_def]
+
+    all_defs = col_lines + table_cons
+    if not all_defs:
+        return ""
+
+    create_stmt = f"CREATE TABLE {_quote_ident(schema)}.{_quote_ident(relname)} (\n  " + ",\n  ".join(all_defs) + "\n);"
+
+    # Append index creation statements (pg_indexes may include the primary key index; that's acceptable)
+    for ix in index_defs:
+        if ix:
+            create_stmt += "\n\n" + ix
+
+    return create_stmt
+
+
+# One round trip for every table in a schema: columns, constraints and indexes aggregated as JSON
+_PG_BULK_DESCRIBE_SQL = (
+    "SELECT n.nspname, c.relname,"
+    " (SELECT coalesce(jsonb_agg(jsonb_build_array(a.attname, format_type(a.atttypid, a.atttypmod),"
+    "   a.attnotnull, pg_get_expr(ad.adbin, ad.adrelid), a.attidentity) ORDER BY a.attnum), '[]'::jsonb)"
+    "  FROM pg_attribute a LEFT JOIN pg_attrdef ad ON a.attrelid = ad.adrelid AND a.attnum = ad.adnum"
+    "  WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped) AS cols,"
+    " (SELECT coalesce(jsonb_agg(pg_get_constraintdef(k.oid) ORDER BY k.contype, k.conname), '[]'::jsonb)"
+    "  FROM pg_constraint k WHERE k.conrelid = c.oid AND k.contype IN ('p','f','u','c')) AS cons,"
+    " (SELECT coalesce(jsonb_agg(i.indexdef ORDER BY i.indexname), '[]'::jsonb)"
+    "  FROM pg_indexes i WHERE i.schemaname = n.nspname AND i.tablename = c.relname) AS idxs"
+    " FROM pg_class c JOIN pg_namespace n ON c.relnamespace = n.oid"
+    " WHERE c.relkind IN ('r','p') AND n.nspname = coalesce(%(schema)s, current_schema())"
+)
+
+
+def _pg_bulk_describe(engine, schema: Optional[str] = None, ms: int = _INTROSPECTION_TIMEOUT * 1000) -> dict:
+    """Return {table_name: CREATE TABLE DDL} for every table in schema (default: current_schema()).
+
+    Replaces four _pg_construct_table_create_sql round trips per table with a single query.
+    Raises on failure so callers can fall back to per-table generation.
+    """
+    out = {}
+    with _timed_connection(engine, ms) as conn:
+        rows = conn.exec_driver_sql(_PG_BULK_DESCRIBE_SQL, {"schema": schema}).fetchall()
+    for nspname, relname, cols, cons, idxs in rows:
+        # jsonb arrives decoded with psycopg2/psycopg; other drivers may hand back text
+        cols, cons, idxs = (json.loads(v) if isinstance(v, str) else (v or []) for v in (cols, cons, idxs))
+        ddl = _pg_format_create_table(nspname, relname, cols, cons, idxs)
+        if ddl:
+            out[relname] = ddl
+    return out
 
 
 def _pg_construct_table_create_sql(engine, table_name: str) -> str:
@@ -437,91 +1115,60 @@ def _pg_construct_table_create_sql(engine, table_name: str) -> str:
             # If caller provided a schema, restrict lookup to that schema for exact match
             if schema_hint:
                 row = conn.exec_driver_sql(
-                    "SELECT n.nspname, c.oid, c.relname"
+                    "SELECT n.nspname, c.oid, c.relname, c.xmin::text"
                     " FROM pg_class c JOIN pg_namespace n ON c.relnamespace = n.oid"
-                    " WHERE n.nspname = :schema AND c.relname = :tbl AND c.relkind IN ('r','p') LIMIT 1",
+                    " WHERE n.nspname = %(schema)s AND c.relname = %(tbl)s AND c.relkind IN ('r','p') LIMIT 1",
                     {"schema": schema_hint, "tbl": tbl_hint},
                 ).fetchone()
             else:
                 # Find the relation and its schema; prefer current_schema via ordering
                 row = conn.exec_driver_sql(
-                    "SELECT n.nspname, c.oid, c.relname"
+                    "SELECT n.nspname, c.oid, c.relname, c.xmin::text"
                     " FROM pg_class c JOIN pg_namespace n ON c.relnamespace = n.oid"
-                    " WHERE c.relname = :name AND c.relkind IN ('r','p')"
+                    " WHERE c.relname = %(name)s AND c.relkind IN ('r','p')"
                     " ORDER BY (n.nspname = current_schema()) DESC LIMIT 1",
                     {"name": table_name},
                 ).fetchone()
             if not row:
                 return ""
-            schema, rel_oid, relname = row[0], row[1], row[2]
+            schema, rel_oid, relname, xmin = row[0], row[1], row[2], row[3]
+            try:
+                cache_key = (_engine_fingerprint(engine), rel_oid, xmin)
+            except Exception:
+                cache_key = None
+            entry = _DDL_CACHE.get(cache_key) if cache_key is not None else None
+            if entry and time.time() - entry[0] < _CACHE_TTL:
+                return entry[1]
 
             # Columns: name, formatted type, not null flag, default expression, identity flag
             cols = conn.exec_driver_sql(
                 "SELECT a.attname, format_type(a.atttypid, a.atttypmod) AS data_type, a.attnotnull AS not_null,"
                 " pg_get_expr(ad.adbin, ad.adrelid) AS default_value, a.attidentity"
                 " FROM pg_attribute a LEFT JOIN pg_attrdef ad ON a.attrelid=ad.adrelid AND a.attnum=ad.adnum"
-                " WHERE a.attrelid = :oid AND a.attnum > 0 AND NOT a.attisdropped ORDER BY a.attnum",
+                " WHERE a.attrelid = %(oid)s AND a.attnum > 0 AND NOT a.attisdropped ORDER BY a.attnum",
                 {"oid": rel_oid},
             ).fetchall()
 
             # Table-level constraints
             cons = conn.exec_driver_sql(
                 "SELECT conname, contype, pg_get_constraintdef(c.oid) as condef"
-                " FROM pg_constraint c WHERE c.conrelid = :oid AND contype IN ('p','f','u','c')"
+                " FROM pg_constraint c WHERE c.conrelid = %(oid)s AND contype IN ('p','f','u','c')"
                 " ORDER BY contype, conname",
                 {"oid": rel_oid},
             ).fetchall()
 
             # Index definitions (pg_indexes returns CREATE INDEX ... statements)
             idxs = conn.exec_driver_sql(
-                "SELECT indexdef FROM pg_indexes WHERE schemaname = :schema AND tablename = :tbl",
+                "SELECT indexdef FROM pg_indexes WHERE schemaname = %(schema)s AND tablename = %(tbl)s",
                 {"schema": schema, "tbl": relname},
             ).fetchall()
 
-            # Build column definitions
-            col_lines = []
-            for r in cols:
-                col_name, col_type, not_null, default_val, identity = r[0], r[1], r[2], r[3], r[4]
-                line = f"{_quote_ident(col_name)} {col_type}"
-                # Identity columns
-                try:
-                    if identity and identity != '':
-                        # attidentity is one of '', 'a' (always), 'd' (by default)
-                        if identity == 'a':
-                            line += ' GENERATED ALWAYS AS IDENTITY'
-                        else:
-                            line += ' GENERATED BY DEFAULT AS IDENTITY'
-                except Exception:
-                    pass
-                # Default expression (e.g., nextval('seq'::regclass))
-                if default_val is not None:
-                    line += f" DEFAULT {default_val}"
-                # Not null
-                if not_null:
-                    line += ' NOT NULL'
-                col_lines.append(line)
-
-            # Table constraints from pg_get_constraintdef (strings like 'PRIMARY KEY (col)')
-            table_cons = []
-            for c in cons:
-                con_def = c[2]
-                if con_def:
-                    table_cons.append(con_def)
-
-            all_defs = col_lines + table_cons
-            if not all_defs:
-                return ""
-
-            # Use the discovered schema (or the hinted schema) to fully qualify the created table
-            create_schema = schema if schema else (schema_hint or 'public')
-            create_stmt = f"CREATE TABLE {_quote_ident(create_schema)}.{_quote_ident(relname)} (\n  " + ",\n  ".join(all_defs) + "\n);"
-
-            # Append index creation statements (pg_indexes may include the primary key index; that's acceptable)
-            for ix in idxs:
-                if ix and ix[0]:
-                    create_stmt += "\n\n" + ix[0]
-
-            return create_stmt
+            ddl = _pg_format_create_table(
+                schema or schema_hint or 'public', relname,
+                cols, [c[2] for c in cons], [ix[0] for ix in idxs])
+            if ddl and cache_key is not None:
+                _DDL_CACHE[cache_key] = (time.time(), ddl)
+            return ddl
     except Exception:
         return ""
 
@@ -537,24 +1184,12 @@ def get_create_sql_for_table(engine: object, table_name: str) -> str:
     Returns an empty string on failure.
     """
     try:
-        from sqlalchemy import MetaData, Table
-        from sqlalchemy.schema import CreateTable
-
-        # Attempt SQLAlchemy reflection + compile first
-        try:
-            meta = MetaData()
-            tbl = Table(table_name, meta, autoload_with=engine)
-            try:
-                return str(CreateTable(tbl).compile(dialect=engine.dialect))
-            except Exception:
-                try:
-                    return str(CreateTable(tbl).compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
-                except Exception:
-                    # fall through to dialect-specific methods
-                    pass
-        except Exception:
-            # fall through to dialect-specific methods
-            pass
+        # Attempt SQLAlchemy reflection + compile first; on failure fall through to dialect-specific methods
+        tbl = _safe(Table, table_name, MetaData(), autoload_with=engine)
+        if tbl is not None:
+            ddl = _safe(_compile_ddl, tbl, engine.dialect)
+            if ddl:
+                return ddl
 
         # Dialect-specific attempts
         dialect_name = getattr(getattr(engine, 'dialect', None), 'name', '') or ''
@@ -613,38 +1248,42 @@ def get_create_sql_for_table(engine: object, table_name: str) -> str:
         return ""
 
 
-def get_create_sql_for_connection(engine: object) -> str:
+def get_create_sql_for_connection(engine: object, cancel_event: Optional[threading.Event] = None,
+                                  on_chunk=None) -> str:
     """Return concatenated CREATE TABLE statements for all tables in the given engine's database.
 
     Uses a fast path for PostgreSQL by invoking pg_dump once when available; otherwise falls back to per-table DDL generation.
+    cancel_event and on_chunk are passed to _run_pgdump so a UI can cancel a long dump and show progress.
     """
     try:
-        from sqlalchemy import inspect
-
-        inspector = inspect(engine)
-        try:
-            try:
-                tables = _call_with_timeout(lambda: inspector.get_table_names()) or []
-            except Exception:
-                tables = []
-        except Exception:
-            tables = []
+        tables = _safe(lambda: describe(engine).tables, default=[])
 
         # If PostgreSQL and pg_dump available, dump full schema once
         dialect_name = getattr(getattr(engine, 'dialect', None), 'name', '') or ''
         dialect_name = dialect_name.lower()
+        batches = math.ceil(len(tables) / _REFLECT_WORKERS) if tables else 1
+        ddl_by_tbl = {}
         if dialect_name in ('postgresql', 'postgres'):
-            pgout = _run_pgdump(engine, None)
+            pgout = _run_pgdump(engine, None, cancel_event=cancel_event, on_chunk=on_chunk)
             if pgout:
                 return pgout
-
-        parts = []
-        for t in sorted(tables):
-            # Protect per-table DDL generation from hanging
+            if cancel_event is not None and cancel_event.is_set():
+                return ""
+            # Without pg_dump, describe every table from pg_catalog in one query
             try:
-                ddl = _call_with_timeout(lambda: get_create_sql_for_table(engine, t))
-            except Exception:
-                ddl = ""
+                ddl_by_tbl = _pg_bulk_describe(engine, ms=_INTROSPECTION_TIMEOUT * 1000 * batches)
+            except Exception as e:
+                logger.debug("Bulk pg_catalog describe failed, falling back per table: %s", e)
+
+        # Generate remaining per-table DDL concurrently; the deadline keeps the old per-table budget per batch
+        missing = [t for t in tables if t not in ddl_by_tbl]
+        if missing:
+            ddl_by_tbl.update(_map_with_deadline(
+                engine, lambda t: get_create_sql_for_table(engine, t), missing,
+                timeout=_INTROSPECTION_TIMEOUT * batches))
+        parts = []
+        for t in tables:
+            ddl = ddl_by_tbl.get(t)
             if ddl:
                 parts.append(f"-- CREATE for table {t}\n{ddl}")
         return "\n\n".join(parts)
@@ -652,6 +1291,46 @@ def get_create_sql_for_connection(engine: object) -> str:
         return ""
 
 
+# One round trip for every (table, column) pair in the current schema, in column order.
+# information_schema only lists objects the user holds a privilege on, while the PostgreSQL
+# inspector reads pg_catalog and sees every table; an empty result falls back to the inspector.
+_TABLES_AND_COLUMNS_SQL = {
+    'postgresql': (
+        "SELECT c.table_name, c.column_name FROM information_schema.columns c"
+        " JOIN information_schema.tables t ON t.table_schema = c.table_schema AND t.table_name = c.table_name"
+        " WHERE c.table_schema = current_schema() AND t.table_type = 'BASE TABLE'"
+        " ORDER BY c.table_name, c.ordinal_position"),
+    'mysql': (
+        "SELECT c.table_name, c.column_name FROM information_schema.columns c"
+        " JOIN information_schema.tables t ON t.table_schema = c.table_schema AND t.table_name = c.table_name"
+        " WHERE c.table_schema = DATABASE() AND t.table_type = 'BASE TABLE'"
+        " ORDER BY c.table_name, c.ordinal_position"),
+    # table-valued pragma functions need SQLite 3.16+; internal sqlite_* tables are skipped like
+    # the SQLAlchemy dialect does
+    'sqlite': (
+        "SELECT m.name, p.name FROM sqlite_master m JOIN pragma_table_info(m.name) p"
+        " WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite~_%' ESCAPE '~'"
+        " ORDER BY m.name, p.cid"),
+}
+_TABLES_AND_COLUMNS_SQL['mariadb'] = _TABLES_AND_COLUMNS_SQL['mysql']
+
+
+def _fast_tables_and_columns(engine) -> Optional[dict]:
+    """Return {table: [columns]} from a single catalog query, or None if the dialect has no fast path.
+
+    The result only covers tables the user has privileges on (see _TABLES_AND_COLUMNS_SQL).
+    """
+    sql = _TABLES_AND_COLUMNS_SQL.get(engine.dialect.name)
+    if sql is None:
+        return None
+    with _timed_connection(engine) as conn:
+        rows = conn.exec_driver_sql(sql).fetchall()
+    result = {}
+    for table_name, column_name in rows:
+        result.setdefault(table_name, []).append(column_name)
+    return {t: result[t] for t in sorted(result)}
+
+
 def get_tables_and_columns(engine: Optional[object] = None) -> dict:
     """Return a mapping of table_name -> list of column names for the given engine.
 
@@ -664,43 +1343,49 @@ def get_tables_and_columns(engine: Optional[object] = None) -> dict:
             engine = _find_engine()
         if engine is None:
             return {}
-        from sqlalchemy import inspect
-
-        inspector = inspect(engine)
-        try:
+        # A description that already covers every table answers without any round trip
+        desc = _DESCRIPTIONS.get(engine)
+        if desc is None or time.time() - desc.ts >= _CACHE_TTL or not desc.detailed.issuperset(desc.tables):
             try:
-                tables = _call_with_timeout(lambda: inspector.get_table_names()) or []
-            except Exception:
-                tables = []
-        except Exception:
-            tables = []
-        result = {}
-        for t in sorted(tables):
-            try:
-                try:
-                    cols = _call_with_timeout(lambda: inspector.get_columns(t)) or []
-                except Exception:
-                    cols = []
-                col_names = [c.get('name') for c in cols if c and c.get('name')]
-                result[t] = col_names
-            except Exception:
-                result[t] = []
-        return result
+                fast = _fast_tables_and_columns(engine)
+                if fast:
+                    return fast
+            except Exception as e:
+                logger.debug("Catalog query for tables/columns failed, using the inspector: %s", e)
+            desc = describe(engine)
+            desc = describe(engine, desc.tables)
+        return {t: [c.get('name') for c in desc.columns.get(t) or [] if c and c.get('name')]
+                for t in desc.tables}
     except Exception:
         return {}
 
 
+# Plain "SELECT <list> FROM [schema.]table" with nothing before FROM that could hide another FROM
+# (quotes, comments, parentheses); anything else goes through sqlparse
+_FAST_SELECT_FROM_RE = re.compile(
+    r'\s*SELECT\b[^\'"`(;/-]*?\bFROM\s+("?)(\w+)\1(?:\.("?)(\w+)\3)?(?=[\s;,]|$)',
+    re.IGNORECASE)
+
+
 def extract_first_table_from_select(sql: str) -> str | None:
     """Attempt to extract the primary table name from a SELECT statement using sqlparse.
 
     Returns the unquoted table name (may be schema-qualified) or None if not found.
     This is best-effort and handles simple SELECT ... FROM ... queries, including quoted
     identifiers and simple schema.table forms. It does not attempt to resolve aliases
-    or complex FROM clauses with joins/subqueries.
+    or complex FROM clauses with joins/subqueries. Results are memoized per SQL text.
     """
+    if not sql or not isinstance(sql, str):
+        return None
+    return _extract_first_table_impl(sql)
+
+
+@functools.lru_cache(maxsize=256)
+def _extract_first_table_impl(sql: str) -> str | None:
     try:
-        if not sql or not isinstance(sql, str):
-            return None
+        m = _FAST_SELECT_FROM_RE.match(sql)
+        if m:
+            return f"{m.group(2)}.{m.group(4)}" if m.group(4) else m.group(2)
         parsed = sqlparse.parse(sql)
         if not parsed:
             return None
@@ -767,8 +1452,7 @@ def get_pk_columns_for_table(engine, table_name: str) -> list:
     try:
         if not table_name:
             return []
-        from sqlalchemy import inspect
-        inspector = inspect(engine)
+        inspector = _inspector_for(engine)
         pk = inspector.get_pk_constraint(table_name)
         if isinstance(pk, dict):
             return pk.get('constrained_columns') or []
@@ -0,0 +1,90 @@
+"""On-disk cache for schema summaries produced by db.metadata.
+
+Entries are stored in a small SQLite database under the app config directory so that a restart
+(or a freshly built engine for the same database) does not have to introspect the schema again.
+Keys are engine fingerprints built by db.metadata; values are the rendered schema text.
+"""
+import os
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(os.path.expanduser("~")) / ".catdbviewer" / "schema_cache.db"
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+_path: Path = DEFAULT_CACHE_PATH
+
+
+def set_cache_path(path: Path) -> None:
+    """Point the cache at a different file (closing any open one); mainly for tests."""
+    global _conn, _path
+    with _lock:
+        if _conn is not None:
+            try:
+                _conn.close()
+            except Exception:
+                pass
+            _conn = None
+        _path = Path(path)
+
+
+def _connection() -> sqlite3.Connection:
+    """Open the cache database on first use. Caller must hold _lock."""
+    global _conn
+    if _conn is None:
+        _path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS schema_cache (key TEXT PRIMARY KEY, ts REAL, payload TEXT)")
+        _conn = conn
+    return _conn
+
+
+def get(key: str, ttl: float) -> Optional[str]:
+    """Return the cached payload for key if it is younger than ttl seconds, else None."""
+    try:
+        with _lock:
+            row = _connection().execute(
+                "SELECT ts, payload FROM schema_cache WHERE key = ?", (key,)).fetchone()
+    except Exception as e:
+        logger.debug("Schema cache read failed: %s", e)
+        return None
+    if row is None or time.time() - row[0] >= ttl:
+        return None
+    return row[1]
+
+
+def put(key: str, payload: str) -> None:
+    """Store payload under key, stamped with the current time."""
+    try:
+        with _lock:
+            conn = _connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_cache (key, ts, payload) VALUES (?, ?, ?)",
+                (key, time.time(), payload))
+            conn.commit()
+    except Exception as e:
+        logger.debug("Schema cache write failed: %s", e)
+
+
+def delete_prefix(prefix: str) -> None:
+    """Remove every entry whose key starts with prefix; an empty prefix clears the cache."""
+    try:
+        with _lock:
+            conn = _connection()
+            if prefix:
+                # substr() comparison avoids LIKE wildcards in URLs being interpreted
+                conn.execute(
+                    "DELETE FROM schema_cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            else:
+                conn.execute("DELETE FROM schema_cache")
+            conn.commit()
+    except Exception as e:
+        logger.debug("Schema cache delete failed: %s", e)
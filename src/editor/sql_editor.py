@@ -5,13 +5,21 @@ from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QTextFormat
 from PyQt6.QtCore import QRegularExpression
 import sys
 from PyQt6.QtWidgets import QPushButton, QHBoxLayout, QInputDialog, QLabel, QDialog, QDialogButtonBox, QPlainTextEdit
-from PyQt6.QtCore import QThread
+from PyQt6.QtCore import QThread, QTimer
 from PyQt6.QtGui import QTextCursor
 from typing import Optional
+import io
+import re
 import threading
+import time
 import json
-from PyQt6.QtGui import QPainter
-from PyQt6.QtCore import QRect, QSize
+from PyQt6.QtGui import QPainter, QStaticText
+from PyQt6.QtCore import QEvent, QRect, QSize
+
+
+# Events after which CodeEditor re-derives its cached colors and font metrics
+_THEME_EVENTS = (QEvent.Type.PaletteChange, QEvent.Type.ApplicationPaletteChange,
+                 QEvent.Type.StyleChange, QEvent.Type.FontChange)
 
 
 class LineNumberArea(QWidget):
@@ -39,9 +47,38 @@ class CodeEditor(QPlainTextEdit):
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
         self.updateRequest.connect(self.updateLineNumberArea)
         self.cursorPositionChanged.connect(self.highlightCurrentLine)
+        self.blockCountChanged.connect(self._trim_static_numbers)
+        # Gutter paint state, rebuilt only on palette/font changes (see changeEvent):
+        # pre-laid-out line numbers by block number, and the x position of a right-aligned number
+        # by digit count (valid for the gutter width in _number_x_width)
+        self._static_numbers: dict[int, QStaticText] = {}
+        self._number_x: dict[int, int] = {}
+        self._number_x_width = -1
+        # current-line highlight state (see highlightCurrentLine)
+        self._line_selection = None
+        self._last_highlight_block = -1
+        self._last_highlight_color = None
+        self._rebuild_palette_cache()
         self.updateLineNumberAreaWidth(0)
-        # Compute highlight colors from the current palette so dark mode works automatically
+        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+
+    def _rebuild_palette_cache(self) -> None:
+        """Derive gutter and current-line colors (and reset font-dependent gutter caches) from the
+        current palette and font; called on construction and on theme/font changes only."""
         pal = self.palette()
+        # derive number color from palette to respect dark mode
+        try:
+            nc = pal.color(QPalette.ColorRole.Mid)
+            # make sure it's slightly muted
+            self._number_color = QColor(nc.red(), nc.green(), nc.blue(), 200)
+        except Exception:
+            self._number_color = QColor('#9aa8b3')
+        # thin separator line to match QSS subtle divider (derived from palette)
+        try:
+            sep_c = pal.color(QPalette.ColorRole.Dark)
+            self._sep_color = QColor(sep_c.red(), sep_c.green(), sep_c.blue(), 30)
+        except Exception:
+            self._sep_color = QColor(11, 26, 43, 12)
         try:
             hl = pal.color(QPalette.ColorRole.Highlight)
             # very subtle alpha blend of the highlight color
@@ -49,7 +86,22 @@ class CodeEditor(QPlainTextEdit):
         except Exception:
             # fallback to a very faint blue
             self._current_line_color = QColor(10, 132, 255, 10)
-        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+        self._number_x.clear()
+        self._static_numbers.clear()
+        # height of one text line, measured from the first laid-out block on the next paint
+        self._line_height = None
+
+    def _trim_static_numbers(self, count: int) -> None:
+        for n in [n for n in self._static_numbers if n >= count]:
+            del self._static_numbers[n]
+
+    def changeEvent(self, event) -> None:
+        # changeEvent can fire from the base constructor, before the gutter state exists
+        if event.type() in _THEME_EVENTS and hasattr(self, '_static_numbers'):
+            self._rebuild_palette_cache()
+            self._line_number_area.update()
+            self.highlightCurrentLine()
+        super().changeEvent(event)
 
     def lineNumberAreaWidth(self) -> int:
         # keep the gutter thin; allow up to 4 digits comfortably
@@ -82,42 +134,67 @@ class CodeEditor(QPlainTextEdit):
         block_number = block.blockNumber()
         top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
         bottom = top + int(self.blockBoundingRect(block).height())
+        rect_top = event.rect().top()
+        rect_bottom = event.rect().bottom()
+        line_height = self._line_height
+        if line_height is None and block.isValid() and block.layout().lineCount():
+            line_height = self._line_height = block.layout().lineAt(0).height()
 
-        # derive number color from palette to respect dark mode
-        try:
-            pal = self.palette()
-            nc = pal.color(QPalette.ColorRole.Mid)
-            # make sure it's slightly muted
-            number_color = QColor(nc.red(), nc.green(), nc.blue(), 200)
-        except Exception:
-            number_color = QColor('#9aa8b3')
-        painter.setPen(number_color)
-        font = self.font()
+        painter.setPen(self._number_color)
         fm = self.fontMetrics()
-
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-                x = self._line_number_area.width() - fm.horizontalAdvance(number) - 6
-                y = top + fm.ascent() + 2
-                painter.drawText(x, y, number)
+        width = self._line_number_area.width()
+        static_numbers = self._static_numbers
+        if width != self._number_x_width:
+            # the gutter widens as the line count gains digits
+            self._number_x.clear()
+            self._number_x_width = width
+        number_x = self._number_x
+        # digit count of block_number + 1, bumped when it reaches the next power of ten
+        digits = len(str(block_number + 1))
+        next_pow = 10 ** digits
+
+        while block.isValid() and top <= rect_bottom:
+            if block.isVisible() and bottom >= rect_top:
+                number = static_numbers.get(block_number)
+                if number is None:
+                    number = static_numbers[block_number] = QStaticText(str(block_number + 1))
+                    # plain text skips the rich-text detection in the one-time layout
+                    number.setTextFormat(Qt.TextFormat.PlainText)
+                x = number_x.get(digits)
+                if x is None:
+                    x = number_x[digits] = width - fm.horizontalAdvance("0" * digits) - 6
+                # drawStaticText takes the top-left corner; this matches a baseline at top + ascent + 2
+                painter.drawStaticText(x, top + 2, number)
             block = block.next()
             top = bottom
-            bottom = top + int(self.blockBoundingRect(block).height())
+            # every line of plain monospace text has the same height, so a laid-out block is
+            # lineCount() lines tall; ask the layout only for blocks not laid out yet (or hidden)
+            lines = block.lineCount() if block.isVisible() else 0
+            if line_height and lines > 0:
+                bottom = top + int(line_height * lines)
+            else:
+                bottom = top + int(self.blockBoundingRect(block).height())
             block_number += 1
+            if block_number + 1 >= next_pow:
+                digits += 1
+                next_pow *= 10
 
-        # thin separator line to match QSS subtle divider (derived from palette)
-        try:
-            sep_c = self.palette().color(QPalette.ColorRole.Dark)
-            sep_color = QColor(sep_c.red(), sep_c.green(), sep_c.blue(), 30)
-        except Exception:
-            sep_color = QColor(11, 26, 43, 12)
-        painter.setPen(sep_color)
-        painter.drawLine(self._line_number_area.width() - 1, event.rect().top(), self._line_number_area.width() - 1, event.rect().bottom())
+        painter.setPen(self._sep_color)
+        painter.drawLine(width - 1, rect_top, width - 1, rect_bottom)
 
     def highlightCurrentLine(self) -> None:
-        # ExtraSelection is provided on QTextEdit, use that type even when inheriting QPlainTextEdit
-        selection = QTextEdit.ExtraSelection()
+        # cursorPositionChanged fires on every keystroke; only touch the extra selections (which
+        # repaints the viewport) when the cursor changed lines or the theme color changed
+        block_number = self.textCursor().blockNumber()
+        if (block_number == self._last_highlight_block
+                and self._last_highlight_color == self._current_line_color):
+            return
+        self._last_highlight_block = block_number
+        self._last_highlight_color = self._current_line_color
+        selection = self._line_selection
+        if selection is None:
+            # ExtraSelection is provided on QTextEdit, use that type even when inheriting QPlainTextEdit
+            selection = self._line_selection = QTextEdit.ExtraSelection()
         selection.format.setBackground(self._current_line_color)
         # Some PyQt6 builds do not expose QTextFormat.FullWidthSelection; avoid setting it to prevent AttributeError.
         # The background will still be applied to the selected line region (text width) which is visually acceptable.
@@ -126,6 +203,12 @@ class CodeEditor(QPlainTextEdit):
         self.setExtraSelections([selection])
 
 
+# AIWorker emits buffered progress once this many chunks arrived or this many seconds passed;
+# a flusher thread also emits on the interval so text buffered before a stall is not held back
+_PROGRESS_BATCH = 8
+_PROGRESS_INTERVAL = 0.033
+
+
 # Background worker thread to call AI client without blocking the UI
 class AIWorker(QThread):
     # Emit structured objects: progress emits tuples like (kind, text)
@@ -138,19 +221,76 @@ class AIWorker(QThread):
         self.prompt = prompt
         self.use_stream = use_stream
         self._stop_event = threading.Event()
+        # streaming HTTP response while one is open; aborted by stop() to end a blocked read
+        self._response = None
+        # chunks received since the last progress emit (see _on_chunk)
+        self._text_parts = {"reasoning": [], "content": []}
+        self._other_chunks = []
+        self._pending_count = 0
+        self._last_emit = 0.0
+        # _on_chunk (stream thread) and the interval flusher share the buffers
+        self._buffer_lock = threading.Lock()
 
     def stop(self):
         try:
             self._stop_event.set()
+            response = self._response
+            if response is not None:
+                from utils.ai_client import abort_response
+
+                abort_response(response)
         except Exception:
             pass
 
+    def _on_response(self, response):
+        self._response = response
+        if self._stop_event.is_set():
+            # stop() ran before the response was published
+            from utils.ai_client import abort_response
+
+            abort_response(response)
+
     def _on_chunk(self, chunk):
-        try:
+        """Buffer a streamed chunk; emit progress every _PROGRESS_INTERVAL or _PROGRESS_BATCH chunks.
+
+        Reasoning and content text is joined per kind within a batch (the two go to separate panes, so
+        their relative order does not matter), so a fast stream queues a couple of cross-thread signals
+        per interval instead of one per token. Other chunks (usage, previews) are forwarded as they came.
+        """
+        with self._buffer_lock:
+            if chunk.__class__ is tuple and len(chunk) == 2 and chunk[0] in self._text_parts:
+                self._text_parts[chunk[0]].append(str(chunk[1]))
+            else:
+                self._other_chunks.append(chunk)
+            self._pending_count += 1
+            if (self._pending_count >= _PROGRESS_BATCH
+                    or time.monotonic() - self._last_emit >= _PROGRESS_INTERVAL):
+                self._flush_progress_locked()
+
+    def _flush_progress(self):
+        with self._buffer_lock:
+            self._flush_progress_locked()
+
+    def _flush_progress_locked(self):
+        # emitting under the lock keeps batches from the two threads in order
+        if not self._pending_count:
+            return
+        self._pending_count = 0
+        self._last_emit = time.monotonic()
+        for kind, parts in self._text_parts.items():
+            if parts:
+                text = ''.join(parts)
+                parts.clear()
+                self.progress.emit((kind, text))
+        others, self._other_chunks = self._other_chunks, []
+        for chunk in others:
             # forward structured chunk (kind, text) or raw string
             self.progress.emit(chunk)
-        except Exception:
-            pass
+
+    def _flush_periodically(self, done: threading.Event):
+        """Emit whatever is buffered every _PROGRESS_INTERVAL until done is set."""
+        while not done.wait(_PROGRESS_INTERVAL):
+            self._flush_progress()
 
     def run(self):
         try:
@@ -159,7 +299,16 @@ class AIWorker(QThread):
 
             if self.use_stream:
                 # streaming callback will feed progress signals; pass stop_event for cooperative cancel
-                res = generate_sql_from_nl(self.prompt, stream_callback=self._on_chunk, stop_event=self._stop_event)
+                stream_done = threading.Event()
+                threading.Thread(target=self._flush_periodically, args=(stream_done,),
+                                 name="ai-progress", daemon=True).start()
+                try:
+                    res = generate_sql_from_nl(self.prompt, stream_callback=self._on_chunk, stop_event=self._stop_event,
+                                               on_response=self._on_response)
+                finally:
+                    stream_done.set()
+                    # deliver the tail of the stream before result/error
+                    self._flush_progress()
             else:
                 res = generate_sql_from_nl(self.prompt, stop_event=self._stop_event)
 
@@ -174,6 +323,67 @@ class AIWorker(QThread):
                 self.error.emit(str(e))
 
 
+# A reasonable monospace font per platform for the SQL editor
+if sys.platform.startswith("win"):
+    _MONO_FAMILY = "Consolas"
+elif sys.platform == "darwin":
+    _MONO_FAMILY = "Menlo"
+else:
+    _MONO_FAMILY = "Monospace"
+
+_EDITOR_FONT: Optional[QFont] = None
+
+
+def _editor_font() -> QFont:
+    """Return the editor font shared by all SqlEditors, built on first use (this module is imported
+    before the QApplication exists). Grayscale antialiasing avoids the subpixel rendering cost."""
+    global _EDITOR_FONT
+    if _EDITOR_FONT is None:
+        font = QFont(_MONO_FAMILY)
+        font.setPointSize(10)
+        font.setStyleStrategy(QFont.StyleStrategy.PreferAntialias | QFont.StyleStrategy.NoSubpixelAntialias)
+        _EDITOR_FONT = font
+    return _EDITOR_FONT
+
+
+# Buffers at least this long are formatted on a BeautifyWorker instead of the UI thread
+_BEAUTIFY_SYNC_LIMIT = 4096
+
+
+def format_sql(sql: str) -> str:
+    """Beautify sql with sqlparse if installed, else normalize statement separation/whitespace."""
+    try:
+        # Import locally so sqlparse is optional
+        import sqlparse  # type: ignore
+
+        return sqlparse.format(sql, reindent=True, keyword_case='upper')
+    except Exception:
+        # fallback: basic normalization (collapse excessive whitespace, keep simple semicolon separation)
+        parts = [p.strip() for p in sql.split(';') if p.strip()]
+        if not parts:
+            return ' '.join(sql.split())
+        formatted = ';\n'.join(parts)
+        if sql.strip().endswith(';'):
+            formatted += ';'
+        return formatted
+
+
+class BeautifyWorker(QThread):
+    """Runs format_sql() off the UI thread for large buffers."""
+    result = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, sql: str, parent=None):
+        super().__init__(parent)
+        self.sql = sql
+
+    def run(self):
+        try:
+            self.result.emit(format_sql(self.sql))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
 class SqlEditor(QWidget):
     """A minimal SQL editor widget wrapping QPlainTextEdit.
 
@@ -202,19 +412,11 @@ class SqlEditor(QWidget):
 
         toolbar.addStretch()
         layout.addLayout(toolbar)
+        self._beautify_worker = None
 
         self.editor = CodeEditor()
         self.editor.setLineWrapMode(QPlainTextEdit.LineWrapMode.WidgetWidth)
-        # Choose a reasonable monospace font per platform
-        if sys.platform.startswith("win"):
-            family = "Consolas"
-        elif sys.platform == "darwin":
-            family = "Menlo"
-        else:
-            family = "Monospace"
-        font = QFont(family)
-        font.setPointSize(10)
-        self.editor.setFont(font)
+        self.editor.setFont(_editor_font())
         layout.addWidget(self.editor)
 
         # Attach SQL highlighter to the editor's document
@@ -307,76 +509,103 @@ class SqlEditor(QWidget):
             split_layout.addWidget(reasoning_edit)
             split_layout.addWidget(content_edit)
             pv_layout.addLayout(split_layout)
+            # Text only ever arrives programmatically: keep no undo history and at most 5000 lines per
+            # pane, so long streams stay bounded in memory
+            for pane in (usage_edit, reasoning_edit, content_edit):
+                pane.setUndoRedoEnabled(False)
+                pane.setMaximumBlockCount(5000)
             preview.show()
 
-            # Buffer to collect only content chunks (final SQL pieces). Reasoning is kept only in preview.
-            content_chunks = []
+            # Collects only content chunks (final SQL pieces). Reasoning is kept only in preview.
+            content_buf = io.StringIO()
+            # Streamed text waiting to be shown; a ~30Hz timer appends it to the panes in one edit each
+            # so fast streams cost one document update per frame instead of one per chunk.
+            pending = {reasoning_edit: [], content_edit: []}
+            # Append-only cursors kept at the end of each pane: inserting through them does not move the
+            # visible cursor (no cursorPositionChanged per flush).
+            end_cursors = {}
+            for pane in pending:
+                cur = QTextCursor(pane.document())
+                cur.movePosition(QTextCursor.MoveOperation.End)
+                end_cursors[pane] = cur
+
+            def _flush_pending():
+                for pane, buf in pending.items():
+                    if buf:
+                        end_cursors[pane].insertText(''.join(buf))
+                        buf.clear()
+                        bar = pane.verticalScrollBar()
+                        bar.setValue(bar.maximum())
+
+            flush_timer = QTimer(preview)
+            flush_timer.setInterval(33)
+            flush_timer.timeout.connect(_flush_pending)
+            flush_timer.start()
+
+            def _stop_flushing():
+                try:
+                    flush_timer.stop()
+                    _flush_pending()
+                except Exception:
+                    # preview (and its panes) may already be gone
+                    pass
 
             def _on_progress(chunk):
-                try:
-                    if not chunk:
-                        return
-                    # chunk is expected to be a tuple (kind, text) per ai_client changes
-                    try:
-                        if isinstance(chunk, tuple) and len(chunk) == 2:
-                            kind, txt = chunk
-                        elif isinstance(chunk, list) and len(chunk) == 2:
-                            kind, txt = chunk
-                        else:
-                            kind, txt = ("content", str(chunk))
-                    except Exception:
-                        kind, txt = ("content", str(chunk))
-
-                    if kind == "reasoning":
-                        reasoning_edit.moveCursor(QTextCursor.MoveOperation.End)
-                        reasoning_edit.insertPlainText(str(txt))
-                        reasoning_edit.moveCursor(QTextCursor.MoveOperation.End)
-                    elif kind == "content":
-                        # show content in the preview content pane and also collect it for final insertion
-                        content_edit.moveCursor(QTextCursor.MoveOperation.End)
-                        content_edit.insertPlainText(str(txt))
-                        content_edit.moveCursor(QTextCursor.MoveOperation.End)
-                        try:
-                            content_chunks.append(str(txt))
-                        except Exception:
-                            pass
-                    elif kind == "usage":
-                        # display usage/metadata in the usage panel
+                if not chunk:
+                    return
+                # chunk is expected to be a tuple (kind, text) per ai_client changes
+                if chunk.__class__ in (tuple, list) and len(chunk) == 2:
+                    kind, txt = chunk
+                else:
+                    kind, txt = "content", chunk
+
+                if kind == "reasoning":
+                    pending[reasoning_edit].append(str(txt))
+                elif kind == "content":
+                    # show content in the preview content pane and also collect it for final insertion
+                    txt = str(txt)
+                    pending[content_edit].append(txt)
+                    content_buf.write(txt)
+                elif kind == "usage":
+                    # display usage/metadata in the usage panel
+                    if isinstance(txt, (dict, list)):
                         try:
-                            if isinstance(txt, (dict, list)):
-                                usage_text = json.dumps(txt, indent=2)
-                            else:
-                                usage_text = str(txt)
-                            usage_edit.setPlainText(usage_text)
-                        except Exception:
-                            try:
-                                usage_edit.setPlainText(str(txt))
-                            except Exception:
-                                pass
+                            usage_text = json.dumps(txt, indent=2)
+                        except (TypeError, ValueError):
+                            usage_text = str(txt)
                     else:
-                        # preview or unknown kinds go to reasoning pane
-                        reasoning_edit.moveCursor(QTextCursor.MoveOperation.End)
-                        reasoning_edit.insertPlainText(f"[{kind}] " + str(txt))
-                        reasoning_edit.moveCursor(QTextCursor.MoveOperation.End)
-                except Exception:
-                    pass
+                        usage_text = str(txt)
+                    try:
+                        usage_edit.setPlainText(usage_text)
+                    except RuntimeError:
+                        # preview already closed (widget deleted)
+                        pass
+                else:
+                    # preview or unknown kinds go to reasoning pane
+                    pending[reasoning_edit].append(f"[{kind}] " + str(txt))
 
             cancelled = {'v': False}
 
             def _on_result(res: str):
+                _stop_flushing()
                 try:
                     # if the worker was cancelled, do not insert final SQL
                     if cancelled['v']:
                         return
                     # Prefer the assembled content chunks (streaming content) as the final SQL so reasoning is not included.
-                    final = ''.join(content_chunks).strip()
+                    final = content_buf.getvalue().strip()
                     # Fallback to the worker's returned text if no content chunks were received (non-streaming or unexpected format)
                     if not final:
                         final = (res or "").strip()
-                    # Insert final SQL into the main editor at current cursor position
+                    # Insert final SQL into the main editor at current cursor position, as one edit block so
+                    # replacing a selection is a single undo step and the document relayouts once
                     try:
                         cur = self.editor.textCursor()
-                        cur.insertText(final + "\n")
+                        cur.beginEditBlock()
+                        try:
+                            cur.insertText(final + "\n")
+                        finally:
+                            cur.endEditBlock()
                         self.editor.setFocus()
                     except Exception:
                         # fallback: append at end
@@ -400,6 +629,7 @@ class SqlEditor(QWidget):
                     self.unsetCursor()
 
             def _on_error(msg: str):
+                _stop_flushing()
                 try:
                     from PyQt6.QtWidgets import QMessageBox
                     QMessageBox.critical(self, "AI Error", f"Failed to generate SQL: {msg}")
@@ -430,6 +660,10 @@ class SqlEditor(QWidget):
                 except Exception:
                     pass
                 finally:
+                    try:
+                        flush_timer.stop()
+                    except Exception:
+                        pass
                     # If the user explicitly cancels, close the preview immediately.
                     try:
                         preview.close()
@@ -480,7 +714,8 @@ class SqlEditor(QWidget):
         """Format the selected SQL or the whole editor content.
 
         Prefers the 'sqlparse' library if available; otherwise falls back to a simple
-        whitespace-normalization fallback. Any errors are shown to the user.
+        whitespace-normalization fallback. Large buffers are formatted on a BeautifyWorker
+        thread while the editor is read-only. Any errors are shown to the user.
         """
         try:
             cursor = self.editor.textCursor()
@@ -496,46 +731,71 @@ class SqlEditor(QWidget):
             if not sql or not sql.strip():
                 return
 
-            formatted = None
-            try:
-                # Import locally so sqlparse is optional
-                import sqlparse  # type: ignore
+            if len(sql) < _BEAUTIFY_SYNC_LIMIT:
+                self._apply_formatted(format_sql(sql), cursor if target_selection else None)
+                return
 
-                formatted = sqlparse.format(sql, reindent=True, keyword_case='upper')
-            except Exception:
-                # fallback: basic normalization (collapse excessive whitespace, keep simple semicolon separation)
-                parts = [p.strip() for p in sql.split(';') if p.strip()]
-                if parts:
-                    formatted = ';\n'.join(parts)
-                    if sql.strip().endswith(';'):
-                        formatted += ';'
-                else:
-                    formatted = ' '.join(sql.split())
+            self.beautify_btn.setEnabled(False)
+            # keep the text (and the selection being formatted) unchanged until the result arrives
+            self.editor.setReadOnly(True)
+            self.setCursor(Qt.CursorShape.WaitCursor)
 
-            if formatted is None:
-                formatted = sql
+            def _done():
+                self.editor.setReadOnly(False)
+                self.beautify_btn.setEnabled(True)
+                self.unsetCursor()
 
-            # Replace selection or whole document preserving focus/cursor
-            if target_selection:
-                # replace current selection
-                cursor.insertText(formatted)
-            else:
-                # try preserve scroll/position by replacing document and restoring cursor
-                cur = self.editor.textCursor()
-                pos = cur.position()
-                self.editor.setPlainText(formatted)
-                # restore a sensible cursor position
-                new_cursor = self.editor.textCursor()
-                new_cursor.setPosition(min(pos, len(formatted)))
-                self.editor.setTextCursor(new_cursor)
-                self.editor.setFocus()
+            def _on_result(formatted: str):
+                _done()
+                try:
+                    self._apply_formatted(formatted, cursor if target_selection else None)
+                except Exception as e:
+                    self._show_format_error(e)
+
+            def _on_error(msg: str):
+                _done()
+                self._show_format_error(msg)
+
+            self._beautify_worker = BeautifyWorker(sql, parent=self)
+            self._beautify_worker.result.connect(_on_result)
+            self._beautify_worker.error.connect(_on_error)
+            self._beautify_worker.finished.connect(lambda: (setattr(self, "_beautify_worker", None), None))
+            self._beautify_worker.start()
         except Exception as e:
-            try:
-                from PyQt6.QtWidgets import QMessageBox
+            self._show_format_error(e)
+
+    def _apply_formatted(self, formatted: str, selection_cursor: Optional[QTextCursor]) -> None:
+        """Replace the selection (if a cursor is given) or the whole document with formatted SQL."""
+        if selection_cursor is not None:
+            # replace current selection
+            selection_cursor.insertText(formatted)
+            return
+        # try preserve scroll/position by replacing document and restoring cursor
+        cur = self.editor.textCursor()
+        pos = cur.position()
+        large = len(formatted) >= _BEAUTIFY_SYNC_LIMIT
+        if large:
+            # detach the highlighter so the replacement does not highlight block by block inside
+            # setPlainText; re-attaching schedules a single rehighlight from the event loop
+            self._highlighter.setDocument(None)
+        try:
+            self.editor.setPlainText(formatted)
+        finally:
+            if large:
+                self._highlighter.setDocument(self.editor.document())
+        # restore a sensible cursor position
+        new_cursor = self.editor.textCursor()
+        new_cursor.setPosition(min(pos, len(formatted)))
+        self.editor.setTextCursor(new_cursor)
+        self.editor.setFocus()
+
+    def _show_format_error(self, e) -> None:
+        try:
+            from PyQt6.QtWidgets import QMessageBox
 
-                QMessageBox.critical(self, "Format Error", f"Failed to format SQL: {e}")
-            except Exception:
-                pass
+            QMessageBox.critical(self, "Format Error", f"Failed to format SQL: {e}")
+        except Exception:
+            pass
 
     def get_sql(self) -> str:
         """Return selected SQL if present, otherwise whole text."""
@@ -561,6 +821,57 @@ class SqlEditor(QWidget):
         self.editor.clear()
 
 
+# SQL token patterns, shared by all highlighters and optimized once per process
+_SQL_KEYWORDS = (
+    "SELECT|FROM|WHERE|INSERT|INTO|VALUES|UPDATE|SET|DELETE|CREATE|TABLE|DROP|ALTER|ADD|COLUMN|INDEX|VIEW|TRIGGER|PRIMARY|KEY|FOREIGN|REFERENCES|CONSTRAINT|UNIQUE|NOT|NULL|DEFAULT|CHECK|JOIN|INNER|LEFT|RIGHT|FULL|OUTER|ON|USING|GROUP|BY|ORDER|HAVING|LIMIT|OFFSET|DISTINCT|AS|UNION|ALL|EXISTS|BETWEEN|LIKE|IN|CASE|WHEN|THEN|ELSE|END"
+)
+
+_SQL_FUNCTIONS = (
+    "COUNT|SUM|AVG|MIN|MAX|NOW|COALESCE|NULLIF|IFNULL|LENGTH|SUBSTR"
+)
+
+_SQL_OPERATORS = r"[=<>!~\+\-\*/%]+"
+
+# One alternation with a named group per token kind, so each block is scanned once.
+# At any position the first alternative wins: comments and strings come before operators
+# ("--" is not an operator run) and keep keywords inside them from being highlighted.
+# Use inline case-insensitive flag (?i) to avoid binding differences in PyQt6's enum names.
+# The (?P<name>...) syntax is understood by both PCRE2 (QRegularExpression) and Python's re.
+_TOKEN_REGEX = (
+    r"(?i)(?P<cmt>--.*)"
+    r"|(?P<str>'(?:''|[^'])*'|\"(?:\\\"|[^\"])*\")"
+    r"|(?P<kw>\b(?:" + _SQL_KEYWORDS + r")\b)"
+    # functions (name followed by open paren)
+    r"|(?P<fn>\b(?:" + _SQL_FUNCTIONS + r")\b\s*(?=\())"
+    r"|(?P<num>\b\d+(?:\.\d+)?\b)"
+    r"|(?P<op>" + _SQL_OPERATORS + r")"
+)
+# Same alternation without keywords/functions, for lines that contain none of those words (e.g. the
+# value rows of a large INSERT); it yields identical matches there without trying the word lists
+_NON_WORD_TOKEN_REGEX = (
+    r"(?P<cmt>--.*)"
+    r"|(?P<str>'(?:''|[^'])*'|\"(?:\\\"|[^\"])*\")"
+    r"|(?P<num>\b\d+(?:\.\d+)?\b)"
+    r"|(?P<op>" + _SQL_OPERATORS + r")"
+)
+_TOKEN_PATTERN = QRegularExpression(_TOKEN_REGEX)
+_TOKEN_PATTERN.optimize()
+_NON_WORD_TOKEN_PATTERN = QRegularExpression(_NON_WORD_TOKEN_REGEX)
+_NON_WORD_TOKEN_PATTERN.optimize()
+# Python re versions for ASCII lines (see SqlHighlighter.highlightBlock); re.ASCII gives \b the same
+# word characters as PCRE2's default
+_PY_TOKEN_RE = re.compile(_TOKEN_REGEX, re.ASCII)
+_PY_NON_WORD_TOKEN_RE = re.compile(_NON_WORD_TOKEN_REGEX, re.ASCII)
+_KEYWORD_SET = frozenset((_SQL_KEYWORDS + "|" + _SQL_FUNCTIONS).split("|"))
+_WORD_RE = re.compile(r"[A-Za-z_]+")
+
+# multi-line comment delimiters
+_BLOCK_COMMENT_START = QRegularExpression(r"/\*")
+_BLOCK_COMMENT_START.optimize()
+_BLOCK_COMMENT_END = QRegularExpression(r"\*/")
+_BLOCK_COMMENT_END.optimize()
+
+
 class SqlHighlighter(QSyntaxHighlighter):
     """Basic SQL syntax highlighter for QPlainTextEdit/QTextDocument.
 
@@ -571,6 +882,18 @@ class SqlHighlighter(QSyntaxHighlighter):
 
     def __init__(self, document):
         super().__init__(document)
+        self._build_formats()
+        # Rebuild formats when the application theme changes (QSS/dark mode switch)
+        from PyQt6.QtWidgets import QApplication
+
+        app = QApplication.instance()
+        if app is not None:
+            app.paletteChanged.connect(self._on_palette_changed)
+        self.token_pattern = _TOKEN_PATTERN
+        self.comment_start_delim = _BLOCK_COMMENT_START
+        self.comment_end_delim = _BLOCK_COMMENT_END
+
+    def _build_formats(self) -> None:
         # Prepare formats derived from the application's palette so QSS-driven
         # theme changes (dark/light) influence syntax colors.
         from PyQt6.QtWidgets import QApplication
@@ -636,68 +959,62 @@ class SqlHighlighter(QSyntaxHighlighter):
         self.function_format = QTextCharFormat()
         self.function_format.setForeground(safe_lighter(highlight, 140))
 
-        # Build regex rules
-        keywords = (
-            "SELECT|FROM|WHERE|INSERT|INTO|VALUES|UPDATE|SET|DELETE|CREATE|TABLE|DROP|ALTER|ADD|COLUMN|INDEX|VIEW|TRIGGER|PRIMARY|KEY|FOREIGN|REFERENCES|CONSTRAINT|UNIQUE|NOT|NULL|DEFAULT|CHECK|JOIN|INNER|LEFT|RIGHT|FULL|OUTER|ON|USING|GROUP|BY|ORDER|HAVING|LIMIT|OFFSET|DISTINCT|AS|UNION|ALL|EXISTS|BETWEEN|LIKE|IN|CASE|WHEN|THEN|ELSE|END"
-        )
-
-        functions = (
-            "COUNT|SUM|AVG|MIN|MAX|NOW|COALESCE|NULLIF|IFNULL|LENGTH|SUBSTR"
-        )
-
-        operators = r"[=<>!~\+\-\*/%]+"
-
-        # compile rules as (QRegularExpression, QTextCharFormat)
-        self.rules = []
-        # keywords
-        # Use inline case-insensitive flag (?i) to avoid binding differences in PyQt6's enum names
-        kw_pattern = QRegularExpression(r"(?i)\b(" + keywords + r")\b")
-        self.rules.append((kw_pattern, self.keyword_format))
-        # functions (name followed by open paren)
-        fn_pattern = QRegularExpression(r"\b(" + functions + r")\b\s*(?=\()")
-        self.rules.append((fn_pattern, self.function_format))
-        # operators
-        op_pattern = QRegularExpression(operators)
-        self.rules.append((op_pattern, self.operator_format))
-        # numeric literals
-        num_pattern = QRegularExpression(r"\b\d+(?:\.\d+)?\b")
-        self.rules.append((num_pattern, self.number_format))
-        # single-quoted and double-quoted strings
-        str_pattern = QRegularExpression(r"'(?:''|[^'])*'|\"(?:\\\"|[^\"])*\"")
-        self.rules.append((str_pattern, self.string_format))
-        # single-line comments -- ...
-        self.comment_start = QRegularExpression(r"--.*")
-        # multi-line comment delimiters
-        self.comment_start_delim = QRegularExpression(r"/\*")
-        self.comment_end_delim = QRegularExpression(r"\*/")
+        self.token_formats = [
+            ("cmt", self.comment_format),
+            ("str", self.string_format),
+            ("kw", self.keyword_format),
+            ("fn", self.function_format),
+            ("num", self.number_format),
+            ("op", self.operator_format),
+        ]
+        self.format_by_group = dict(self.token_formats)
+
+    def _on_palette_changed(self, _palette) -> None:
+        self._build_formats()
+        self.rehighlight()
 
     def highlightBlock(self, text: str) -> None:
         """Apply syntax highlighting rules to the given block of text.
 
         Supports multi-line C-style comments with block state tracking.
         """
-        # apply standard rules
-        for pattern, fmt in getattr(self, 'rules', []):
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                start = match.capturedStart()
-                length = match.capturedLength()
-                self.setFormat(start, length, fmt)
-
-        # single-line comments
-        itc = self.comment_start.globalMatch(text)
-        while itc.hasNext():
-            m = itc.next()
-            self.setFormat(m.capturedStart(), m.capturedLength(), self.comment_format)
+        in_comment = self.previousBlockState() == 1
+        # cheap substring prefilters: a line inside an unterminated /* ... */ is all comment, and blank
+        # lines or lines without comment delimiters need no token or delimiter regex at all
+        if in_comment and "*/" not in text:
+            self.setFormat(0, len(text), self.comment_format)
+            self.setCurrentBlockState(1)
+            return
+
+        if text and not text.isspace():
+            has_words = not _KEYWORD_SET.isdisjoint(_WORD_RE.findall(text.upper()))
+            if text.isascii():
+                # Fast path: Python's re reports the group name directly and needs no Qt match object
+                # per token. Only for ASCII, where its offsets equal the UTF-16 positions setFormat takes.
+                formats = self.format_by_group
+                for match in (_PY_TOKEN_RE if has_words else _PY_NON_WORD_TOKEN_RE).finditer(text):
+                    start = match.start()
+                    self.setFormat(start, match.end() - start, formats[match.lastgroup])
+            else:
+                # single pass over the line; the named group that matched picks the format
+                it = (self.token_pattern if has_words else _NON_WORD_TOKEN_PATTERN).globalMatch(text)
+                while it.hasNext():
+                    match = it.next()
+                    for name, fmt in self.token_formats:
+                        start = match.capturedStart(name)
+                        if start >= 0:
+                            self.setFormat(start, match.capturedLength(name), fmt)
+                            break
 
         # handle multi-line comments with block state
-        start_idx = 0
-        if self.previousBlockState() == 1:
+        state = 0
+        if in_comment:
             start_idx = 0
-        else:
+        elif "/*" in text:
             m = self.comment_start_delim.match(text)
             start_idx = m.capturedStart() if m.hasMatch() else -1
+        else:
+            start_idx = -1
 
         while start_idx >= 0:
             m_end = self.comment_end_delim.match(text, start_idx)
@@ -709,9 +1026,8 @@ class SqlHighlighter(QSyntaxHighlighter):
             else:
                 # comment continues to next block
                 self.setFormat(start_idx, len(text) - start_idx, self.comment_format)
-                self.setCurrentBlockState(1)
+                state = 1
                 start_idx = -1
 
-        # if no unclosed comment found, reset block state
-        if self.currentBlockState() != 1:
-            self.setCurrentBlockState(0)
\ No newline at end of file
+        # set explicitly: the block keeps its state from the previous highlighting run otherwise
+        self.setCurrentBlockState(state)
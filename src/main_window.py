@@ -17,6 +17,7 @@ from PyQt6.QtCore import Qt, QUrl
 import traceback
 import re
 from sqlalchemy import inspect, text
+from sqlalchemy.engine import Row
 import logging
 import os
 
@@ -34,7 +35,7 @@ from utils.worker import ExecutionWorker
 from ui.ai_settings_dialog import AISettingsDialog
 from utils.settings import load_ai_settings, save_ai_settings, CONFIG_DIR, load_app_state, save_app_state
 from db.metadata import clear_schema_cache, extract_first_table_from_select, get_pk_columns_for_table
-from db.executor import apply_updates, delete_row
+from db.executor import apply_updates, delete_row, cleanup_executor_workers
 
 
 class MainWindow(QMainWindow):
@@ -49,16 +50,8 @@ class MainWindow(QMainWindow):
 
         self.conn_mgr = ConnectionManager()
 
-        # Expose the active ConnectionManager to other modules (e.g., db.metadata._find_engine)
-        # so that metadata introspection reuses the application's engines instead of constructing
-        # a new manager from saved configs. This ensures the AI prompt reflects the currently
-        # selected datasource (e.g., MySQL vs PostgreSQL).
-        try:
-            import db.connection as _db_conn_mod
-            _db_conn_mod.conn_mgr = self.conn_mgr
-        except Exception:
-            # best-effort: do not fail UI init if assignment fails
-            pass
+        # ConnectionManager registers itself as the active manager, so db.metadata introspection
+        # (e.g. the AI prompt schema) uses the engines of the currently selected datasource.
 
         self._init_actions()
         self._init_ui()
@@ -576,7 +569,7 @@ class MainWindow(QMainWindow):
                     # but also display truncation as a status bar hint when flagged.
                     if columns == ["Message"] and rows:
                         try:
-                            first_cell = rows[0][0] if isinstance(rows[0], (list, tuple)) else rows[0]
+                            first_cell = rows[0][0] if isinstance(rows[0], (list, tuple, Row)) else rows[0]
                         except Exception:
                             first_cell = None
                         # show truncation notice in status bar if flagged
@@ -1472,6 +1465,11 @@ class MainWindow(QMainWindow):
                 pass
         except Exception:
             pass
+        # abort statements left running by timed-out/cancelled queries so they can't hold up exit
+        try:
+            cleanup_executor_workers()
+        except Exception:
+            pass
         # proceed with normal close
         try:
             super().closeEvent(event)
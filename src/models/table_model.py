@@ -6,7 +6,7 @@ class TableModel(QAbstractTableModel):
     """Simple table model for query results with optional editing support.
 
     columns: list of column names
-    rows: list of row tuples
+    rows: list of row tuples (or tuple-like rows such as SQLAlchemy Row objects)
 
     If pk_columns is provided (list of column names), the model will allow editing
     of non-PK columns, track pending edits, and support row removal. Edits are kept
@@ -174,9 +174,11 @@ class TableModel(QAbstractTableModel):
 
     def get_pending_changes(self) -> List[Dict[str, Any]]:
         """Return a list of pending updates in the format:
-        [{'row': int, 'pk': {col: value, ...}, 'changes': {col: value, ...}}, ...]
+        [{'row': int, 'pk': {col: value, ...}, 'changes': {col: value, ...},
+          'original': {col: value, ...}}, ...]
 
         PK values are taken from current row values for the configured PK columns.
+        'original' holds the values the changed columns had when the result was loaded.
         """
         out: List[Dict[str, Any]] = []
         if not self._pk_columns:
@@ -188,7 +190,11 @@ class TableModel(QAbstractTableModel):
             except Exception:
                 pk = {}
             ch = {self._columns[c]: self._rows[r][c] for c in changes.keys()}
-            out.append({'row': r, 'pk': pk, 'changes': ch})
+            try:
+                orig = {self._columns[c]: self._original_rows[r][c] for c in changes.keys()}
+            except Exception:
+                orig = {}
+            out.append({'row': r, 'pk': pk, 'changes': ch, 'original': orig})
         return out
 
     def get_pending_deletes(self) -> List[Dict[str, Any]]:
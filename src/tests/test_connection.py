@@ -42,3 +42,95 @@ def test_parse_sqlite_jdbc():
     assert out.get('conn_type').startswith('sqlite')
     # database/path for sqlite should be present
     assert out.get('database') is not None
+
+
+def test_parse_jdbc_returns_independent_copies():
+    jdbc = 'jdbc:mysql://localhost:3306/test_db?useSSL=false'
+    first = parse_jdbc_url(jdbc)
+    first['host'] = 'changed'
+    first['params']['extra'] = '1'
+    second = parse_jdbc_url(jdbc)
+    assert second.get('host') == 'localhost'
+    assert 'extra' not in second.get('params')
+
+
+def test_config_roundtrip(tmp_path):
+    from db.connection import ConnectionManager
+
+    db_file = tmp_path / 'data.db'
+    db_file.write_bytes(b'')
+    cfg_path = tmp_path / 'config.json'
+    mgr = ConnectionManager(config_path=cfg_path)
+    name = mgr.add_sqlite_connection(str(db_file))
+    # writes happen on a background thread; wait for them before reloading
+    mgr.flush_config()
+    reloaded = ConnectionManager(config_path=cfg_path)
+    assert name in reloaded.list_connections()
+    assert reloaded._configs[name]['path'] == str(db_file.resolve())
+    # engines are rebuilt lazily from config and then reused
+    engine = reloaded.get_connection(name)
+    assert reloaded.get_connection(name) is engine
+
+
+def test_load_config_legacy_encoding(tmp_path):
+    from db.connection import ConnectionManager
+
+    cfg_path = tmp_path / 'config.json'
+    cfg_path.write_bytes('{"库": {"type": "sqlite", "path": "x.db"}}'.encode('cp936'))
+    mgr = ConnectionManager(config_path=cfg_path)
+    assert mgr.list_connections() == ['库']
+
+
+def test_save_config_coalesces_writes(tmp_path):
+    from db.connection import ConnectionManager
+
+    cfg_path = tmp_path / 'config.json'
+    mgr = ConnectionManager(config_path=cfg_path)
+    names = []
+    for i in range(5):
+        db_file = tmp_path / f'data{i}.db'
+        db_file.write_bytes(b'')
+        names.append(mgr.add_sqlite_connection(str(db_file)))
+    mgr.flush_config()
+    assert not (tmp_path / 'config.tmp').exists()
+    assert sorted(ConnectionManager(config_path=cfg_path).list_connections()) == sorted(names)
+
+
+def test_probe_address_skips_socket_connections():
+    from db.connection import _probe_address
+
+    assert _probe_address({"type": "postgresql", "host": "db.example.com"}) == ("db.example.com", 5432)
+    # no host (or MySQL "localhost") means the driver connects through the Unix socket
+    assert _probe_address({"type": "postgresql", "host": ""}) is None
+    assert _probe_address({"type": "mysql", "host": "localhost", "port": "3306"}) is None
+    assert _probe_address({"type": "postgresql", "host": "localhost"}) == ("localhost", 5432)
+
+
+def test_config_writer_does_not_keep_manager_alive(tmp_path):
+    import gc
+    import weakref
+    from db.connection import ConnectionManager
+
+    db_file = tmp_path / 'data.db'
+    db_file.write_bytes(b'')
+    mgr = ConnectionManager(config_path=tmp_path / 'config.json')
+    mgr.add_sqlite_connection(str(db_file))
+    mgr.flush_config()
+    worker = mgr._save_thread
+    ref = weakref.ref(mgr)
+    del mgr
+    gc.collect()
+    assert ref() is None
+    worker.join(timeout=2)
+    assert not worker.is_alive()
+
+
+def test_search_path_option_handles_schema_lists():
+    from db.connection import _search_path_option, _with_search_path
+
+    assert _search_path_option("public,foo") == "-c search_path=public,foo"
+    assert _search_path_option("Sales, public") == '-c search_path="Sales",public'
+    assert _search_path_option('"MixedCase"') == '-c search_path="MixedCase"'
+    # an explicit search_path in options is kept as the only one
+    assert _with_search_path("-c search_path=a,b", "a,b") == "-c search_path=a,b"
+    assert _with_search_path("-c TimeZone=UTC", "foo") == "-c TimeZone=UTC -c search_path=foo"
@@ -7,8 +7,8 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from sqlalchemy import create_engine
-from db.executor import execute_sql
+from sqlalchemy import create_engine, text
+from db.executor import execute_sql, split_statements, apply_updates
 
 
 def test_execute_sql_create_insert_select():
@@ -35,4 +35,110 @@ def test_execute_sql_create_insert_select():
                     break
         except Exception:
             continue
-    assert found, 'SELECT result with id/name not found'
\ No newline at end of file
+    assert found, 'SELECT result with id/name not found'
+
+def test_split_statements_ignores_quoted_separators():
+    sql = """
+    INSERT INTO t (name) VALUES ('a;b'), ('it''s; ok');
+    -- comment; not a statement
+    SELECT "x;y" FROM t; /* ; */
+    SELECT $$body;$$;
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 3
+    assert statements[0].endswith("('it''s; ok')")
+    assert statements[1].endswith('SELECT "x;y" FROM t')
+    assert statements[2].endswith('SELECT $$body;$$')
+
+
+def test_apply_updates_groups_by_column_set():
+    engine = create_engine('sqlite:///:memory:')
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER, name TEXT, age INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1, 'a', 10), (2, 'b', 20), (NULL, 'c', 30)"))
+    pending = [
+        {'changes': {'name': 'x'}, 'pk': {'id': 1}},
+        {'changes': {'name': 'y'}, 'pk': {'id': 2}},
+        {'changes': {'age': 99}, 'pk': {'id': None}},
+    ]
+    assert apply_updates(engine, 't', pending) == 3
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT name, age FROM t ORDER BY name")).fetchall()
+    assert [tuple(r) for r in rows] == [('c', 99), ('x', 10), ('y', 20)]
+
+
+def test_apply_updates_non_atomic_autocommits():
+    engine = create_engine('sqlite:///:memory:')
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER, name TEXT)"))
+        conn.execute(text("INSERT INTO t VALUES (1, 'a')"))
+    pending = [
+        {'changes': {'name': 'x'}, 'pk': {'id': 1}},
+        {'changes': {'missing': 'y'}, 'pk': {'id': 1}},
+    ]
+    with pytest.raises(Exception):
+        apply_updates(engine, 't', pending, atomic=False)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM t")).scalar() == 'x'
+
+
+def test_apply_updates_skips_unchanged_columns():
+    engine = create_engine('sqlite:///:memory:')
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER, name TEXT, age INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1, 'a', 10), (2, 'b', 20)"))
+    pending = [
+        # edits come from the grid as strings while originals keep the loaded types
+        {'changes': {'name': 'a', 'age': '11'}, 'pk': {'id': 1}, 'original': {'name': 'a', 'age': 10}},
+        {'changes': {'name': 'b', 'age': '20'}, 'pk': {'id': 2}, 'original': {'name': 'b', 'age': 20}},
+    ]
+    assert apply_updates(engine, 't', pending) == 1
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT name, age FROM t ORDER BY id")).fetchall()
+    assert [tuple(r) for r in rows] == [('a', 11), ('b', 20)]
+
+
+def test_split_statements_backslash_escapes_are_mysql_only():
+    sql = r"SELECT 'C:\'; SELECT 2"
+    assert split_statements(sql) == [r"SELECT 'C:\'", "SELECT 2"]
+    assert split_statements(r"SELECT E'it\'s; ok'; SELECT 2") == [r"SELECT E'it\'s; ok'", "SELECT 2"]
+    # in MySQL \' escapes the quote, so the ';' stays inside the literal
+    assert split_statements(r"SELECT 'it\'s; ok'; SELECT 2", dialect='mysql') == [r"SELECT 'it\'s; ok'", "SELECT 2"]
+
+
+def test_select_into_is_not_streamed():
+    from db.executor import _is_streamable
+
+    assert _is_streamable("SELECT * FROM t")
+    assert _is_streamable("SELECT 'into' AS \"INTO\" FROM t -- into")
+    assert not _is_streamable("SELECT * INTO new_table FROM t")
+    assert not _is_streamable("/* copy */ select id into temp t2 from t")
+
+
+def test_stream_results_is_set_per_statement():
+    from sqlalchemy import event
+    from sqlalchemy.pool import StaticPool
+
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    seen = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        seen.append((statement.split()[0], bool(context.execution_options.get('stream_results'))))
+
+    execute_sql(engine, "CREATE TABLE t (id INTEGER); SELECT 1; INSERT INTO t VALUES (1); UPDATE t SET id = 2")
+    # DML after a streamed SELECT on the same connection must not inherit stream_results
+    assert seen == [('CREATE', False), ('SELECT', True), ('INSERT', False), ('UPDATE', False)]
+
+
+def test_execute_sql_time_each_false_reports_script_total():
+    from sqlalchemy.pool import StaticPool
+
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    sql = "CREATE TABLE t (id INTEGER); INSERT INTO t VALUES (1), (2); SELECT id FROM t ORDER BY id"
+    results = execute_sql(engine, sql, time_each=False)
+    assert [r[2] for r in results[:-1]] == [None, None]
+    assert results[1][1] == [("Affected rows: 2",)]
+    cols, rows, elapsed, truncated = results[-1]
+    assert cols == ['id'] and [tuple(r) for r in rows] == [(1,), (2,)] and not truncated
+    assert isinstance(elapsed, float) and elapsed >= 0
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+# ensure project src is on path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from utils.qss import minify_qss, write_minified
+
+
+def test_minify_qss_strips_comments_and_whitespace():
+    src = '/* theme */\nQMainWindow, QDialog {\n  border-radius: 8px;\n}\n'
+    assert minify_qss(src) == 'QMainWindow,QDialog{border-radius:8px;}'
+
+
+def test_minify_qss_keeps_descendant_selectors_and_strings():
+    src = 'QWidget[dark="true"] QLineEdit {\n  font-family: "Segoe UI", "Noto Sans";\n}'
+    assert minify_qss(src) == 'QWidget[dark="true"] QLineEdit{font-family:"Segoe UI","Noto Sans";}'
+
+
+def test_write_minified(tmp_path):
+    src = tmp_path / 'style.qss'
+    src.write_text('QWidget {\n  color: #000;\n}\n', encoding='utf-8')
+    dst = write_minified(src)
+    assert dst.name == 'style.min.qss'
+    assert dst.read_text(encoding='utf-8') == 'QWidget{color:#000;}'
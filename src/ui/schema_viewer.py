@@ -1,8 +1,9 @@
-from PyQt6.QtWidgets import QDialog, QHBoxLayout, QPlainTextEdit, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem, QMenu, QMessageBox
+from PyQt6.QtWidgets import QDialog, QHBoxLayout, QPlainTextEdit, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem, QMenu, QMessageBox, QProgressDialog
 from PyQt6.QtCore import Qt, pyqtSignal, QPoint
 from PyQt6.QtGui import QGuiApplication
 from sqlalchemy import inspect
-from db.metadata import get_create_sql_for_table, get_create_sql_for_connection
+from db.metadata import get_create_sql_for_table
+from utils.worker import CreateSqlWorker
 
 class SchemaViewerDialog(QDialog):
     """Dialog to view schema of a database connection (tables and details).
@@ -17,6 +18,8 @@ class SchemaViewerDialog(QDialog):
         self.setWindowTitle("Schema Viewer")
         self.resize(900, 600)
         self.engine = engine
+        # background fetch for "Copy CREATE SQL (all tables)"
+        self._create_worker = None
 
         layout = QHBoxLayout(self)
 
@@ -110,18 +113,7 @@ class SchemaViewerDialog(QDialog):
                 text = item.text(0) if item.text(0) is not None else ""
                 if text.lower().startswith('tables'):
                     act = menu.addAction("Copy CREATE SQL (all tables)")
-                    def _copy_all():
-                        try:
-                            ddl = get_create_sql_for_connection(self.engine)
-                            if not ddl:
-                                QMessageBox.warning(self, "No DDL", "Could not obtain CREATE statements for this connection.")
-                                return
-                            QGuiApplication.clipboard().setText(ddl)
-                            QMessageBox.information(self, "Copied", "CREATE SQL for all tables copied to clipboard.")
-                        except Exception as e:
-                            QMessageBox.critical(self, "Error", f"Failed to copy CREATE SQL: {e}")
-
-                    act.triggered.connect(_copy_all)
+                    act.triggered.connect(self._copy_all_create_sql)
 
             # show menu if it has actions
             if menu.actions():
@@ -131,6 +123,39 @@ class SchemaViewerDialog(QDialog):
             # best-effort: swallow UI errors
             return
 
+    def _copy_all_create_sql(self):
+        """Fetch CREATE statements for every table in a worker thread (pg_dump can take a while)."""
+        if self._create_worker is not None and self._create_worker.isRunning():
+            return
+        progress = QProgressDialog("Fetching CREATE statements...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Copy CREATE SQL")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        worker = CreateSqlWorker(self.engine, self)
+        self._create_worker = worker
+
+        def _on_progress(received: int):
+            progress.setLabelText(f"Fetching CREATE statements... ({received // 1024} KB received)")
+
+        def _on_result(ddl: str):
+            progress.close()
+            if not ddl:
+                QMessageBox.warning(self, "No DDL", "Could not obtain CREATE statements for this connection.")
+                return
+            QGuiApplication.clipboard().setText(ddl)
+            QMessageBox.information(self, "Copied", "CREATE SQL for all tables copied to clipboard.")
+
+        def _on_error(msg: str):
+            progress.close()
+            QMessageBox.critical(self, "Error", f"Failed to copy CREATE SQL: {msg}")
+
+        worker.progress.connect(_on_progress)
+        worker.result_ready.connect(_on_result)
+        worker.error.connect(_on_error)
+        worker.finished.connect(progress.close)
+        progress.canceled.connect(worker.stop)
+        worker.start()
+        progress.show()
+
     def _show_table_details(self, table_name: str):
         if not table_name:
             return
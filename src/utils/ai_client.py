@@ -4,6 +4,7 @@ import os
 from typing import Optional
 import requests
 import codecs
+import socket
 import threading
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -26,7 +27,31 @@ def _build_session(retries: int = 3, backoff_factor: float = 0.5, status_forceli
     return s
 
 
-def generate_sql_from_nl(nl: str, timeout: int = 15, max_tokens: int = 1024, stream_callback: Optional[callable] = None, stop_event: Optional[threading.Event] = None) -> str:
+def abort_response(response: requests.Response) -> None:
+    """Close a streaming response from another thread, unblocking a read that waits on the socket.
+
+    Response.close() alone leaves a thread blocked in recv() until the server sends more data, so the
+    underlying socket is shut down first. urllib3 keeps it on the raw response's connection, unless
+    http.client already detached it there (Connection: close), in which case only the response's
+    socket reader still holds it.
+    """
+    try:
+        raw = response.raw
+        sock = getattr(getattr(raw, "_connection", None), "sock", None)
+        if sock is None:
+            reader = getattr(getattr(getattr(raw, "_fp", None), "fp", None), "raw", None)
+            sock = getattr(reader, "_sock", None)
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except Exception:
+        pass
+    try:
+        response.close()
+    except Exception:
+        pass
+
+
+def generate_sql_from_nl(nl: str, timeout: int = 15, max_tokens: int = 1024, stream_callback: Optional[callable] = None, stop_event: Optional[threading.Event] = None, on_response: Optional[callable] = None) -> str:
     """Use an OpenAI-compatible chat/completions API to generate SQL from natural language.
 
     Behavior:
@@ -35,6 +60,10 @@ def generate_sql_from_nl(nl: str, timeout: int = 15, max_tokens: int = 1024, str
       - Posts to base_url; if base_url does not appear to contain '/chat' or '/completions', append '/chat/completions'.
       - Expects a response with choices[0].message.content (OpenAI Chat Completions).
 
+    Cancellation: set stop_event to stop streaming. on_response, if given, is called with the streaming
+    requests.Response as soon as it is open; passing it to abort_response() from another thread (after
+    setting stop_event) ends a blocked read immediately instead of waiting for the next chunk.
+
     Raises AIClientError on network or parsing errors.
     """
     if not nl or not nl.strip():
@@ -61,32 +90,35 @@ def generate_sql_from_nl(nl: str, timeout: int = 15, max_tokens: int = 1024, str
     if include_schema:
         try:
             # Lazy import to avoid hard dependency; projects can provide a helper
-            # function get_current_db_schema() that returns a string representation
-            # of the current connection's schema (tables/columns/primary keys/etc.).
-            get_current_db_schema = None
+            # function get_schema_for_prompt() that returns a string representation
+            # of the current connection's schema (tables/columns/primary keys/etc.),
+            # optionally restricted to the tables the question mentions.
+            get_schema_for_prompt = None
+            tables_mentioned_in = None
             # Try several import strategies: prefer absolute imports so running as a script (with src on sys.path)
             # works; fall back to package-relative imports when used as a package.
             try:
-                logger.debug("Attempting absolute import db.metadata.get_current_db_schema")
-                from db.metadata import get_current_db_schema  # type: ignore
-                logger.debug("Imported db.metadata.get_current_db_schema successfully (absolute)")
+                logger.debug("Attempting absolute import db.metadata.get_schema_for_prompt")
+                from db.metadata import get_schema_for_prompt, tables_mentioned_in  # type: ignore
+                logger.debug("Imported db.metadata.get_schema_for_prompt successfully (absolute)")
             except Exception as e1:
-                logger.debug("Absolute import db.metadata.get_current_db_schema failed: %s", e1)
+                logger.debug("Absolute import db.metadata.get_schema_for_prompt failed: %s", e1)
                 try:
-                    logger.debug("Attempting package-relative import ..db.metadata.get_current_db_schema")
-                    from ..db.metadata import get_current_db_schema  # type: ignore
-                    logger.debug("Imported ..db.metadata.get_current_db_schema successfully (relative)")
+                    logger.debug("Attempting package-relative import ..db.metadata.get_schema_for_prompt")
+                    from ..db.metadata import get_schema_for_prompt, tables_mentioned_in  # type: ignore
+                    logger.debug("Imported ..db.metadata.get_schema_for_prompt successfully (relative)")
                 except Exception as e2:
-                    logger.debug("Relative import ..db.metadata.get_current_db_schema failed: %s", e2)
-                    get_current_db_schema = None  # type: ignore
+                    logger.debug("Relative import ..db.metadata.get_schema_for_prompt failed: %s", e2)
+                    get_schema_for_prompt = None  # type: ignore
 
-            if not callable(get_current_db_schema):
-                logger.debug("get_current_db_schema not available or not callable; skipping schema inclusion")
+            if not callable(get_schema_for_prompt):
+                logger.debug("get_schema_for_prompt not available or not callable; skipping schema inclusion")
             else:
                 try:
-                    logger.debug("Calling get_current_db_schema() to fetch schema for prompt")
-                    fetched = get_current_db_schema()
-                    logger.debug("get_current_db_schema() returned type=%s", type(fetched))
+                    tables = tables_mentioned_in(nl) if callable(tables_mentioned_in) else ()
+                    logger.debug("Calling get_schema_for_prompt(tables=%s) to fetch schema for prompt", tables)
+                    fetched = get_schema_for_prompt(tables=tables)
+                    logger.debug("get_schema_for_prompt() returned type=%s", type(fetched))
                     if fetched:
                         schema_text = fetched if isinstance(fetched, str) else str(fetched)
                         # Do not impose an artificial character limit on the fetched schema.
@@ -102,7 +134,7 @@ def generate_sql_from_nl(nl: str, timeout: int = 15, max_tokens: int = 1024, str
                         except Exception:
                             pass
                     else:
-                        logger.debug("get_current_db_schema() returned empty or None; no schema will be included in prompt")
+                        logger.debug("get_schema_for_prompt() returned empty or None; no schema will be included in prompt")
                 except Exception as e:
                     logger.debug("Failed to fetch DB schema: %s", e, exc_info=True)
         except Exception:
@@ -180,6 +212,8 @@ def generate_sql_from_nl(nl: str, timeout: int = 15, max_tokens: int = 1024, str
                 r.encoding = 'utf-8'
             except Exception:
                 pass
+            if callable(on_response):
+                on_response(r)
 
             full = []
             try:
@@ -190,13 +224,9 @@ def generate_sql_from_nl(nl: str, timeout: int = 15, max_tokens: int = 1024, str
                     if chunk_bytes is None:
                         continue
                     # cooperative cancellation: stop if requested
-                    try:
-                        if stop_event is not None and stop_event.is_set():
-                            # abort streaming early
-                            raise StopIteration
-                    except Exception:
-                        # ignore problems checking stop_event
-                        pass
+                    if stop_event is not None and stop_event.is_set():
+                        # abort streaming early
+                        raise StopIteration
                     try:
                         text_chunk = decoder.decode(chunk_bytes)
                     except Exception:
@@ -387,7 +417,8 @@ def generate_sql_from_nl(nl: str, timeout: int = 15, max_tokens: int = 1024, str
             except StopIteration:
                 combined = ''.join(full)
             except Exception:
-                combined = None
+                # a response closed by a cancelling caller fails mid-read; that is not a reason to retry
+                combined = ''.join(full) if stop_event is not None and stop_event.is_set() else None
 
             if combined is not None:
                 text = combined
@@ -0,0 +1,25 @@
+import logging
+import time
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter whose default ``asctime`` reuses the strftime result per second.
+
+    Output matches logging.Formatter; only records that land in a new second
+    pay for time.strftime, the rest just append the milliseconds.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (second, strftime prefix) kept as one tuple so threads never see a torn pair
+        self._time_cache = (None, '')
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, prefix = self._time_cache
+        if second != cached_second:
+            prefix = time.strftime(self.default_time_format, self.converter(record.created))
+            self._time_cache = (second, prefix)
+        return self.default_msec_format % (prefix, record.msecs)
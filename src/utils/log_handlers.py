@@ -0,0 +1,23 @@
+import os
+from logging.handlers import RotatingFileHandler
+
+
+class SizeCachedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that decides rollover from the open stream position.
+
+    The stock shouldRollover() stats the log file on every record; we only
+    own the file through this handler, so stream.tell() is enough. The log
+    directory is created on first open, which pairs with ``delay=True``.
+    """
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+    def shouldRollover(self, record):
+        if self.maxBytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        msg = "%s\n" % self.format(record)
+        return self.stream.tell() + len(msg) >= self.maxBytes
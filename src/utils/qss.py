@@ -0,0 +1,63 @@
+"""QSS stylesheet helpers.
+
+Run this module as a script before packaging to write the minified
+stylesheet that app.py prefers at startup:
+
+    python src/utils/qss.py
+"""
+import re
+import sys
+from pathlib import Path
+
+# Quoted strings are kept verbatim; comments are dropped and whitespace runs collapsed
+_QSS_TOKEN_RE = re.compile(r'("[^"]*"|\'[^\']*\')|(/\*.*?\*/)|(\s+)', re.S)
+# Whitespace next to these characters carries no meaning
+_NO_SPACE_AFTER = set('{};,:')
+_NO_SPACE_BEFORE = set('{};,')
+
+MINIFIED_SUFFIX = '.min.qss'
+
+
+def minify_qss(text: str) -> str:
+    """Strip comments and redundant whitespace from a QSS stylesheet.
+
+    Whitespace inside quoted strings is preserved, and a single space is kept
+    between selector parts since it denotes a descendant selector.
+    """
+    out = []
+    pending_space = False
+    pos = 0
+    for m in _QSS_TOKEN_RE.finditer(text):
+        if m.start() > pos:
+            chunk = text[pos:m.start()]
+            if pending_space and out and out[-1][-1] not in _NO_SPACE_AFTER and chunk[0] not in _NO_SPACE_BEFORE:
+                out.append(' ')
+            out.append(chunk)
+            pending_space = False
+        if m.group(1):
+            if pending_space and out and out[-1][-1] not in _NO_SPACE_AFTER:
+                out.append(' ')
+            out.append(m.group(1))
+            pending_space = False
+        elif m.group(3):
+            pending_space = True
+        pos = m.end()
+    if pos < len(text):
+        chunk = text[pos:]
+        if pending_space and out and out[-1][-1] not in _NO_SPACE_AFTER and chunk[0] not in _NO_SPACE_BEFORE:
+            out.append(' ')
+        out.append(chunk)
+    return ''.join(out)
+
+
+def write_minified(src: Path) -> Path:
+    """Write ``<name>.min.qss`` next to ``src`` and return its path."""
+    dst = src.with_name(src.stem + MINIFIED_SUFFIX)
+    dst.write_text(minify_qss(src.read_text(encoding='utf-8')), encoding='utf-8')
+    return dst
+
+
+if __name__ == '__main__':
+    default = Path(__file__).resolve().parents[1] / 'ui' / 'ios_style.qss'
+    for arg in sys.argv[1:] or [str(default)]:
+        print(write_minified(Path(arg)))
@@ -2,6 +2,9 @@ from PyQt6.QtCore import QThread, pyqtSignal
 from typing import List, Tuple, Any
 import threading
 
+# Scripts with more statements than this are timed as a whole instead of statement by statement
+_TIME_EACH_MAX_STATEMENTS = 100
+
 class ExecutionWorker(QThread):
     """Run SQL execution in a background thread and emit results.
 
@@ -20,10 +23,13 @@ class ExecutionWorker(QThread):
 
     def run(self):
         # delay import to avoid circular
-        from db.executor import execute_sql
+        from db.executor import execute_sql, split_statements
 
         try:
-            results = execute_sql(self.engine, self.sql, stop_event=self._stop_event)
+            # long scripts of small statements report one total elapsed on the last result
+            dialect = getattr(getattr(self.engine, 'dialect', None), 'name', None)
+            time_each = len(split_statements(self.sql, dialect)) <= _TIME_EACH_MAX_STATEMENTS
+            results = execute_sql(self.engine, self.sql, stop_event=self._stop_event, time_each=time_each)
             self.results_ready.emit(results)
         except Exception as e:
             self.error.emit(str(e))
@@ -31,4 +37,40 @@ class ExecutionWorker(QThread):
             self.finished_signal.emit()
 
     def stop(self):
-        self._stop_event.set()
\ No newline at end of file
+        self._stop_event.set()
+
+class CreateSqlWorker(QThread):
+    """Collect CREATE statements for a whole connection in a background thread.
+
+    stop() cancels a running pg_dump; progress reports the number of characters received so far.
+    """
+
+    result_ready = pyqtSignal(str)
+    progress = pyqtSignal(int)
+    error = pyqtSignal(str)
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # delay import to avoid circular
+        from db.metadata import get_create_sql_for_connection
+
+        received = 0
+
+        def _on_chunk(chunk: str):
+            nonlocal received
+            received += len(chunk)
+            self.progress.emit(received)
+
+        try:
+            ddl = get_create_sql_for_connection(self.engine, cancel_event=self._stop_event, on_chunk=_on_chunk)
+            if not self._stop_event.is_set():
+                self.result_ready.emit(ddl)
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def stop(self):
+        self._stop_event.set()